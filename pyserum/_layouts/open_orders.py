@@ -1,3 +1,5 @@
+import struct
+
 from construct import Bytes, Int64ul, Padding
 from construct import Struct as cStruct
 
@@ -19,3 +21,19 @@ OPEN_ORDERS_LAYOUT = cStruct(
     "referrer_rebate_accrued" / Int64ul,
     Padding(7),
 )
+
+# Precompiled struct formats for decoding open orders accounts without construct. The header runs from the start of the
+# account to the order slots: account flags as a u64, market, owner, the four balances and the two slot bitmasks.
+OPEN_ORDERS_HEADER_STRUCT = struct.Struct("<5xQ32s32sQQQQ16s16s")
+OPEN_ORDERS_ORDER_STRUCT = struct.Struct("<QQ")
+OPEN_ORDERS_CLIENT_ID_STRUCT = struct.Struct("<Q")
+OPEN_ORDERS_SLOT_COUNT = 128
+OPEN_ORDERS_ORDERS_OFFSET = OPEN_ORDERS_HEADER_STRUCT.size
+OPEN_ORDERS_CLIENT_IDS_OFFSET = OPEN_ORDERS_ORDERS_OFFSET + OPEN_ORDERS_SLOT_COUNT * OPEN_ORDERS_ORDER_STRUCT.size
+
+# The four balances, base free and total then quote free and total, fetched alone through a data slice.
+OPEN_ORDERS_BALANCES_OFFSET = 5 + 8 + 32 + 32
+OPEN_ORDERS_BALANCES_STRUCT = struct.Struct("<QQQQ")
+
+ACCOUNT_FLAG_INITIALIZED = 1
+ACCOUNT_FLAG_OPEN_ORDERS = 1 << 2
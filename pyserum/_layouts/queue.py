@@ -1,6 +1,11 @@
+import struct
+from functools import lru_cache
+from typing import Any
+
 from construct import BitsInteger, BitsSwapped, BitStruct, Bytes, Const, Flag, Int8ul, Int32ul, Int64ul, Padding
 from construct import Struct as cStruct
 
+from .._numpy import require_numpy
 from .account_flags import ACCOUNT_FLAGS_LAYOUT
 
 QUEUE_HEADER_LAYOUT = cStruct(
@@ -59,3 +64,48 @@ EVENT_LAYOUT = cStruct(
     "public_key" / Bytes(32),
     "client_order_id" / Int64ul,
 )
+
+# Precompiled struct formats mirroring the request and event layouts above, order ids are read as (low, high) u64s.
+# The flags are kept as a byte and decoded with the masks below, bits are numbered from the least significant one.
+REQUEST_STRUCT = struct.Struct("<BBB5xQQQQ32sQ")
+EVENT_STRUCT = struct.Struct("<BBB5xQQQQQ32sQ")
+
+REQUEST_NEW_ORDER_FLAG = 1
+REQUEST_CANCEL_ORDER_FLAG = 1 << 1
+REQUEST_BID_FLAG = 1 << 2
+REQUEST_POST_ONLY_FLAG = 1 << 3
+REQUEST_IOC_FLAG = 1 << 4
+
+EVENT_FILL_FLAG = 1
+EVENT_OUT_FLAG = 1 << 1
+EVENT_BID_FLAG = 1 << 2
+EVENT_MAKER_FLAG = 1 << 3
+
+# Offsets of the open orders address within a request and an event, used to filter items before decoding them.
+REQUEST_OPEN_ORDERS_OFFSET = 40
+EVENT_PUBLIC_KEY_OFFSET = 48
+
+
+@lru_cache(maxsize=None)
+def event_dtype() -> Any:
+    """NumPy dtype of an 88-byte event, the flags are left as a byte to be read with the masks above."""
+    np = require_numpy()
+    return np.dtype(
+        {
+            "names": [
+                "event_flags",
+                "open_order_slot",
+                "fee_tier",
+                "native_quantity_released",
+                "native_quantity_paid",
+                "native_fee_or_rebate",
+                "order_id_low",
+                "order_id_high",
+                "public_key",
+                "client_order_id",
+            ],
+            "formats": ["u1", "u1", "u1", "<u8", "<u8", "<u8", "<u8", "<u8", "V32", "<u8"],
+            "offsets": [0, 1, 2, 8, 16, 24, 32, 40, 48, 80],
+            "itemsize": EVENT_STRUCT.size,
+        }
+    )
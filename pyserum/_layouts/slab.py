@@ -1,12 +1,16 @@
 """Slab data stucture that is used to represent Order book."""
 from __future__ import annotations
 
+import struct
 from enum import IntEnum
+from functools import lru_cache
+from typing import Any
 
 from construct import Bytes, Int8ul, Int32ul, Int64ul, Padding
 from construct import Struct as cStruct
 from construct import Switch
 
+from .._numpy import require_numpy
 from .account_flags import ACCOUNT_FLAGS_LAYOUT
 
 KEY = Bytes(16)
@@ -64,3 +68,38 @@ SLAB_NODE_LAYOUT = cStruct(
 SLAB_LAYOUT = cStruct("header" / SLAB_HEADER_LAYOUT, "nodes" / SLAB_NODE_LAYOUT[lambda this: this.header.bump_index])
 
 ORDER_BOOK_LAYOUT = cStruct(Padding(5), "account_flags" / ACCOUNT_FLAGS_LAYOUT, "slab_layout" / SLAB_LAYOUT, Padding(7))
+
+# Precompiled struct formats mirroring the layouts above, used to decode the slab straight off the buffer.
+# Every node struct starts at the tag so it can be unpacked at the node offset, keys are read as (low, high) u64s.
+SLAB_HEADER_STRUCT = struct.Struct("<I4xI4xIII4x")
+SLAB_NODE_SIZE = 72
+SLAB_NODE_TAG_STRUCT = struct.Struct("<I")
+INNER_NODE_STRUCT = struct.Struct("<4xIQQII40x")
+LEAF_NODE_STRUCT = struct.Struct("<4xBB2xQQ32sQQ")
+FREE_NODE_STRUCT = struct.Struct("<4xI64x")
+
+
+@lru_cache(maxsize=None)
+def slab_node_dtype() -> Any:
+    """NumPy dtype of a 72-byte slab node, the inner, leaf and free node fields overlap like a C union."""
+    np = require_numpy()
+    return np.dtype(
+        {
+            "names": [
+                "tag",
+                "prefix_len",
+                "owner_slot",
+                "fee_tier",
+                "next",
+                "key_low",
+                "key_high",
+                "children",
+                "owner",
+                "quantity",
+                "client_order_id",
+            ],
+            "formats": ["<u4", "<u4", "u1", "u1", "<u4", "<u8", "<u8", ("<u4", (2,)), "V32", "<u8", "<u8"],
+            "offsets": [0, 4, 4, 5, 4, 8, 16, 24, 24, 56, 64],
+            "itemsize": SLAB_NODE_SIZE,
+        }
+    )
@@ -0,0 +1,15 @@
+"""Helpers for the optional NumPy support, installed with `pip install pyserum[numpy]`."""
+from types import ModuleType
+from typing import Any
+
+# Arrays are typed loosely so that type checking does not need NumPy either.
+NDArray = Any
+
+
+def require_numpy() -> ModuleType:
+    """Import NumPy, raising a helpful error when the optional dependency is missing."""
+    try:
+        import numpy  # pylint: disable=import-outside-toplevel
+    except ImportError as err:
+        raise ImportError("NumPy is required for array support, install it with `pip install pyserum[numpy]`.") from err
+    return numpy
@@ -1,8 +1,16 @@
+import asyncio
+from typing import List, Optional, Sequence, Union
+
 from solana.publickey import PublicKey
 from solana.rpc.async_api import AsyncClient
 from spl.token.constants import WRAPPED_SOL_MINT
 
-from pyserum.utils import parse_bytes_data, parse_mint_decimals
+from pyserum.utils import (
+    MULTIPLE_ACCOUNTS_CHUNK_SIZE,
+    parse_bytes_data,
+    parse_mint_decimals,
+    parse_multiple_bytes_data,
+)
 
 
 async def load_bytes_data(addr: PublicKey, conn: AsyncClient) -> bytes:
@@ -10,6 +18,27 @@ async def load_bytes_data(addr: PublicKey, conn: AsyncClient) -> bytes:
     return parse_bytes_data(res)
 
 
+async def load_multiple_bytes_data(
+    addrs: Sequence[PublicKey],
+    conn: AsyncClient,
+    chunk_size: int = MULTIPLE_ACCOUNTS_CHUNK_SIZE,
+    concurrent: bool = False,
+) -> List[Optional[bytes]]:
+    """Load the data of many accounts with one getMultipleAccounts request per chunk, missing accounts are None.
+
+    With `concurrent`, the requests of all the chunks are sent at once instead of one after the other.
+    """
+    chunks: List[List[Union[PublicKey, str]]] = []
+    for start in range(0, len(addrs), chunk_size):
+        end = start + chunk_size
+        chunks.append(list(addrs[start:end]))
+    if concurrent:
+        responses = await asyncio.gather(*(conn.get_multiple_accounts(chunk) for chunk in chunks))
+    else:
+        responses = [await conn.get_multiple_accounts(chunk) for chunk in chunks]
+    return [bytes_data for res in responses for bytes_data in parse_multiple_bytes_data(res)]
+
+
 async def get_mint_decimals(conn: AsyncClient, mint_pub_key: PublicKey) -> int:
     """Get the mint decimals for a token mint"""
     if mint_pub_key == WRAPPED_SOL_MINT:
@@ -1,4 +1,7 @@
+from ._internal.queue import EventQueueCursor  # noqa: F401
 from .async_market import AsyncMarket  # noqa: F401
+from .cache import MarketCache  # noqa: F401
 from .market import Market  # noqa: F401
 from .orderbook import OrderBook  # noqa: F401
 from .state import MarketState as State  # noqa: F401
+from .trades import TradeTape  # noqa: F401
@@ -1,12 +1,29 @@
-import math
 from enum import IntEnum
-from typing import List, Optional, Tuple, Union, cast
+from typing import AbstractSet, Iterable, List, Optional, Tuple, Union, cast
 
 from construct import Container
 from solana.publickey import PublicKey
 
-from ..._layouts.queue import EVENT_LAYOUT, QUEUE_HEADER_LAYOUT, REQUEST_LAYOUT
-from ..types import Event, EventFlags, Request, ReuqestFlags
+from ..._layouts.queue import (
+    EVENT_BID_FLAG,
+    EVENT_FILL_FLAG,
+    EVENT_MAKER_FLAG,
+    EVENT_OUT_FLAG,
+    EVENT_PUBLIC_KEY_OFFSET,
+    EVENT_STRUCT,
+    QUEUE_HEADER_LAYOUT,
+    REQUEST_BID_FLAG,
+    REQUEST_CANCEL_ORDER_FLAG,
+    REQUEST_IOC_FLAG,
+    REQUEST_NEW_ORDER_FLAG,
+    REQUEST_OPEN_ORDERS_OFFSET,
+    REQUEST_POST_ONLY_FLAG,
+    REQUEST_STRUCT,
+    event_dtype,
+)
+from ..._numpy import NDArray, require_numpy
+from ...utils import intern_public_key
+from ..types import Event, EventFlags, EventQueueUpdate, Request, ReuqestFlags
 
 
 class QueueType(IntEnum):
@@ -14,80 +31,225 @@ class QueueType(IntEnum):
     REQUEST = 2
 
 
+# The header only holds the low 32 bits of the sequence number, so sequence numbers wrap around at this value.
+SEQ_NUM_MODULUS = 1 << 32
+
+
 def __from_bytes(
-    buffer: bytes, queue_type: QueueType, history: Optional[int]
+    buffer: bytes,
+    queue_type: QueueType,
+    history: Optional[int],
+    flags: int = 0,
+    owners: Optional[AbstractSet[bytes]] = None,
 ) -> Tuple[Container, List[Union[Event, Request]]]:
+    """Decode the items of the ring buffer in place, unpacking each one at its offset in a memoryview.
+
+    Items missing any of the `flags` bits, or whose open orders address is not in `owners`, are skipped from their raw
+    bytes before anything is decoded.
+    """
     header = QUEUE_HEADER_LAYOUT.parse(buffer)
-    layout_size = EVENT_LAYOUT.sizeof() if queue_type == QueueType.EVENT else REQUEST_LAYOUT.sizeof()
-    alloc_len = math.floor((len(buffer) - QUEUE_HEADER_LAYOUT.sizeof()) / layout_size)
-    nodes: List[Union[Event, Request]] = []
+    header_size = QUEUE_HEADER_LAYOUT.sizeof()
+    layout_size = EVENT_STRUCT.size if queue_type == QueueType.EVENT else REQUEST_STRUCT.size
+    alloc_len = (len(buffer) - header_size) // layout_size
     if history:
-        for i in range(min(history, alloc_len)):
-            node_index = (header.head + header.count + alloc_len - 1 - i) % alloc_len
-            offset = QUEUE_HEADER_LAYOUT.sizeof() + node_index * layout_size
-            nodes.append(__parse_queue_item(buffer[offset : offset + layout_size], queue_type))  # noqa: E203
+        last = header.head + header.count + alloc_len - 1
+        indexes = [(last - i) % alloc_len for i in range(min(history, alloc_len))]
     else:
-        for i in range(header.count):
-            node_index = (header.head + i) % alloc_len
-            offset = QUEUE_HEADER_LAYOUT.sizeof() + node_index * layout_size
-            nodes.append(__parse_queue_item(buffer[offset : offset + layout_size], queue_type))  # noqa: E203
+        indexes = [(header.head + i) % alloc_len for i in range(header.count)]
+    if flags or owners is not None:
+        indexes = _filter_indexes(buffer, indexes, queue_type, flags, owners)
+    view = memoryview(buffer)
+    parse_item = _parse_event if queue_type == QueueType.EVENT else _parse_request
+    nodes: List[Union[Event, Request]] = [parse_item(view, header_size + index * layout_size) for index in indexes]
     return header, nodes
 
 
-def __parse_queue_item(buffer: bytes, queue_type: QueueType) -> Union[Event, Request]:
-    if queue_type == QueueType.EVENT:  # pylint: disable=no-else-return
-        parsed_item = EVENT_LAYOUT.parse(buffer)
-        parsed_event_flags = parsed_item.event_flags
-        event_flags = EventFlags(
-            fill=parsed_event_flags.fill,
-            out=parsed_event_flags.out,
-            bid=parsed_event_flags.bid,
-            maker=parsed_event_flags.maker,
-        )
-
-        return Event(
-            event_flags=event_flags,
-            open_order_slot=parsed_item.open_order_slot,
-            fee_tier=parsed_item.fee_tier,
-            native_quantity_released=parsed_item.native_quantity_released,
-            native_quantity_paid=parsed_item.native_quantity_paid,
-            native_fee_or_rebate=parsed_item.native_fee_or_rebate,
-            order_id=int.from_bytes(parsed_item.order_id, "little"),
-            public_key=PublicKey(parsed_item.public_key),
-            client_order_id=parsed_item.client_order_id,
-        )
+def _filter_indexes(
+    buffer: bytes, indexes: List[int], queue_type: QueueType, flags: int, owners: Optional[AbstractSet[bytes]]
+) -> List[int]:
+    """Keep the slots whose flags byte has all the `flags` bits and whose open orders address is in `owners`."""
+    header_size = QUEUE_HEADER_LAYOUT.sizeof()
+    if queue_type == QueueType.EVENT:
+        layout_size, owner_offset = EVENT_STRUCT.size, EVENT_PUBLIC_KEY_OFFSET
     else:
-        parsed_item = REQUEST_LAYOUT.parse(buffer)
-        parsed_request_flags = parsed_item.request_flags
-        request_flags = ReuqestFlags(
-            new_order=parsed_request_flags.new_order,
-            cancel_order=parsed_request_flags.cancel_order,
-            bid=parsed_request_flags.bid,
-            post_only=parsed_request_flags.post_only,
-            ioc=parsed_request_flags.ioc,
-        )
-
-        return Request(
-            request_flags=request_flags,
-            open_order_slot=parsed_item.open_order_slot,
-            fee_tier=parsed_item.fee_tier,
-            max_base_size_or_cancel_id=parsed_item.max_base_size_or_cancel_id,
-            native_quote_quantity_locked=parsed_item.native_quote_quantity_locked,
-            order_id=int.from_bytes(parsed_item.order_id, "little"),
-            open_orders=PublicKey(parsed_item.open_orders),
-            client_order_id=parsed_item.client_order_id,
-        )
-
-
-def decode_request_queue(buffer: bytes, history: Optional[int] = None) -> List[Request]:
-    header, nodes = __from_bytes(buffer, QueueType.REQUEST, history)
+        layout_size, owner_offset = REQUEST_STRUCT.size, REQUEST_OPEN_ORDERS_OFFSET
+    if flags:
+        # The flags byte leads each item, a strided slice gathers them all without a Python loop.
+        slot_flags = buffer[header_size::layout_size]
+        indexes = [index for index in indexes if slot_flags[index] & flags == flags]
+    if owners is not None:
+        # Search the raw buffer for each owner and keep the hits that land on the address field of a slot.
+        slots = set()
+        for owner in owners:
+            position = buffer.find(owner, header_size)
+            while position != -1:
+                slot, remainder = divmod(position - header_size - owner_offset, layout_size)
+                if remainder == 0:
+                    slots.add(slot)
+                position = buffer.find(owner, position + 1)
+        indexes = [index for index in indexes if index in slots]
+    return indexes
+
+
+def _owner_set(owners: Optional[Iterable[Union[PublicKey, bytes]]]) -> Optional[AbstractSet[bytes]]:
+    return None if owners is None else {bytes(owner) for owner in owners}
+
+
+def _parse_event(buffer: memoryview, offset: int) -> Event:
+    (
+        flags,
+        open_order_slot,
+        fee_tier,
+        native_quantity_released,
+        native_quantity_paid,
+        native_fee_or_rebate,
+        order_id_low,
+        order_id_high,
+        public_key,
+        client_order_id,
+    ) = EVENT_STRUCT.unpack_from(buffer, offset)
+    return Event(
+        event_flags=EventFlags(
+            fill=bool(flags & EVENT_FILL_FLAG),
+            out=bool(flags & EVENT_OUT_FLAG),
+            bid=bool(flags & EVENT_BID_FLAG),
+            maker=bool(flags & EVENT_MAKER_FLAG),
+        ),
+        open_order_slot=open_order_slot,
+        fee_tier=fee_tier,
+        native_quantity_released=native_quantity_released,
+        native_quantity_paid=native_quantity_paid,
+        native_fee_or_rebate=native_fee_or_rebate,
+        order_id=(order_id_high << 64) | order_id_low,
+        public_key=intern_public_key(public_key),
+        client_order_id=client_order_id,
+    )
+
+
+def _parse_request(buffer: memoryview, offset: int) -> Request:
+    (
+        flags,
+        open_order_slot,
+        fee_tier,
+        max_base_size_or_cancel_id,
+        native_quote_quantity_locked,
+        order_id_low,
+        order_id_high,
+        open_orders,
+        client_order_id,
+    ) = REQUEST_STRUCT.unpack_from(buffer, offset)
+    return Request(
+        request_flags=ReuqestFlags(
+            new_order=bool(flags & REQUEST_NEW_ORDER_FLAG),
+            cancel_order=bool(flags & REQUEST_CANCEL_ORDER_FLAG),
+            bid=bool(flags & REQUEST_BID_FLAG),
+            post_only=bool(flags & REQUEST_POST_ONLY_FLAG),
+            ioc=bool(flags & REQUEST_IOC_FLAG),
+        ),
+        open_order_slot=open_order_slot,
+        fee_tier=fee_tier,
+        max_base_size_or_cancel_id=max_base_size_or_cancel_id,
+        native_quote_quantity_locked=native_quote_quantity_locked,
+        order_id=(order_id_high << 64) | order_id_low,
+        open_orders=intern_public_key(open_orders),
+        client_order_id=client_order_id,
+    )
+
+
+def decode_request_queue(
+    buffer: bytes,
+    history: Optional[int] = None,
+    new_orders_only: bool = False,
+    owners: Optional[Iterable[Union[PublicKey, bytes]]] = None,
+) -> List[Request]:
+    """Decode the request queue, optionally keeping only new orders and the requests of some open orders accounts.
+
+    `history` counts the slots read from the queue, before the filters are applied.
+    """
+    flags = REQUEST_NEW_ORDER_FLAG if new_orders_only else 0
+    header, nodes = __from_bytes(buffer, QueueType.REQUEST, history, flags, _owner_set(owners))
     if not header.account_flags.initialized or not header.account_flags.request_queue:
         raise Exception("Invalid requests queue, either not initialized or not a request queue.")
     return cast(List[Request], nodes)
 
 
-def decode_event_queue(buffer: bytes, history: Optional[int] = None) -> List[Event]:
-    header, nodes = __from_bytes(buffer, QueueType.EVENT, history)
+def decode_event_queue(
+    buffer: bytes,
+    history: Optional[int] = None,
+    fills_only: bool = False,
+    owners: Optional[Iterable[Union[PublicKey, bytes]]] = None,
+) -> List[Event]:
+    """Decode the event queue, optionally keeping only fills and the events of some open orders accounts.
+
+    `history` counts the slots read from the queue, before the filters are applied.
+    """
+    flags = EVENT_FILL_FLAG if fills_only else 0
+    header, nodes = __from_bytes(buffer, QueueType.EVENT, history, flags, _owner_set(owners))
     if not header.account_flags.initialized or not header.account_flags.event_queue:
         raise Exception("Invalid events queue, either not initialized or not a event queue.")
     return cast(List[Event], nodes)
+
+
+def decode_event_queue_array(buffer: bytes, history: Optional[int] = None) -> NDArray:
+    """Decode the event queue into a NumPy structured array with `event_dtype`, in the order of `decode_event_queue`.
+
+    Requires the optional NumPy dependency.
+    """
+    np = require_numpy()
+    header = QUEUE_HEADER_LAYOUT.parse(buffer)
+    if not header.account_flags.initialized or not header.account_flags.event_queue:
+        raise Exception("Invalid events queue, either not initialized or not a event queue.")
+    header_size = QUEUE_HEADER_LAYOUT.sizeof()
+    alloc_len = (len(buffer) - header_size) // EVENT_STRUCT.size
+    if history:
+        indexes = (header.head + header.count + alloc_len - 1 - np.arange(min(history, alloc_len))) % alloc_len
+    else:
+        indexes = (header.head + np.arange(header.count)) % alloc_len
+    ring = np.frombuffer(buffer, dtype=event_dtype(), count=alloc_len, offset=header_size)
+    return ring[indexes]
+
+
+class EventQueueCursor:  # pylint: disable=too-few-public-methods
+    """Remembers how far an event queue has been read, so that each poll only decodes the events added since.
+
+    Events are located from the sequence number in the queue header, the event numbered `next_seq_num - 1` is the
+    last one written at `head + count - 1`. Events read off the ring are not consumed, so the cursor also sees events
+    that the crank already processed, as long as they have not been overwritten.
+    """
+
+    def __init__(self, seq_num: Optional[int] = None) -> None:
+        # Sequence number of the next event to read, None until the cursor has seen the queue once.
+        self.seq_num = seq_num
+
+    def update(self, buffer: bytes) -> EventQueueUpdate:
+        """Decode the events added since the last update.
+
+        The first update of a cursor created without a sequence number only records the current position. If more
+        than a full ring of events were added since the last update the oldest ones are gone, `lost` counts them.
+        A queue older than the cursor, as served by a lagging node, gives no events and leaves the cursor in place.
+        """
+        header = QUEUE_HEADER_LAYOUT.parse(buffer)
+        if not header.account_flags.initialized or not header.account_flags.event_queue:
+            raise Exception("Invalid events queue, either not initialized or not a event queue.")
+        next_seq_num = header.next_seq_num
+        if self.seq_num is None:
+            self.seq_num = next_seq_num
+            return EventQueueUpdate(events=[], seq_num=next_seq_num, lost=0)
+
+        added = (next_seq_num - self.seq_num) % SEQ_NUM_MODULUS
+        if added >= SEQ_NUM_MODULUS // 2:
+            # The queue is behind the cursor rather than more than half the sequence numbers ahead of it.
+            return EventQueueUpdate(events=[], seq_num=self.seq_num, lost=0)
+
+        header_size = QUEUE_HEADER_LAYOUT.sizeof()
+        alloc_len = (len(buffer) - header_size) // EVENT_STRUCT.size
+        lost = max(added - alloc_len, 0)
+        new = added - lost
+        first_index = (header.head + header.count - new) % alloc_len
+        view = memoryview(buffer)
+        events = [
+            _parse_event(view, header_size + ((first_index + i) % alloc_len) * EVENT_STRUCT.size) for i in range(new)
+        ]
+        first_seq_num = (self.seq_num + lost) % SEQ_NUM_MODULUS
+        self.seq_num = next_seq_num
+        return EventQueueUpdate(events=events, seq_num=first_seq_num, lost=lost)
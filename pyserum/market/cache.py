@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional, Set, Tuple
+
+from solana.publickey import PublicKey
+from solana.rpc.api import Client
+from solana.rpc.async_api import AsyncClient
+
+from pyserum import async_utils, utils
+
+from .._layouts.market import MARKET_LAYOUT
+from .state import MarketState
+
+
+class MarketCache:  # pylint: disable=too-many-instance-attributes
+    """Opt-in on-disk cache of market accounts and mint decimals, so that markets load without any request.
+
+    Markets are keyed by program id and address, and mint decimals by mint, in a JSON file that is rewritten
+    atomically on every change. The addresses, lot sizes and decimals of a market never change, but the deposit and
+    fee counters read from a cached market are as old as the entry.
+
+    A market cached for more than `max_age` seconds is still returned, and is reloaded in the background when
+    `revalidate` is set. A market cached for more than `max_stale` seconds is reloaded before being returned.
+    """
+
+    VERSION = 1
+
+    def __init__(
+        self, path: str, max_age: float = 24 * 60 * 60, max_stale: Optional[float] = None, revalidate: bool = True
+    ) -> None:
+        self.path = path
+        self.max_age = max_age
+        self.max_stale = max_stale
+        self.revalidate = revalidate
+        self._lock = threading.Lock()
+        self._markets: Optional[Dict[str, Dict[str, Any]]] = None
+        self._mints: Dict[str, int] = {}
+        self._revalidating: Set[str] = set()
+        self._threads: Set[threading.Thread] = set()
+        self._tasks: Set[asyncio.Future] = set()
+
+    def load(self, conn: Client, market_address: PublicKey, program_id: PublicKey) -> MarketState:
+        """Load a market state from the cache, or from the connection when it is missing or too stale."""
+        key = self.__key(market_address, program_id)
+        cached = self.__cached(key)
+        if cached is not None:
+            bytes_data, age = cached
+            if self.max_stale is None or age <= self.max_stale:
+                state = self.__make_state(bytes_data, program_id)
+                if state is not None:
+                    if self.revalidate and age > self.max_age and self.__start_revalidation(key):
+                        self.__revalidate_in_thread(conn, market_address, program_id)
+                    return state
+        return self.__fetch(conn, market_address, program_id)
+
+    async def async_load(self, conn: AsyncClient, market_address: PublicKey, program_id: PublicKey) -> MarketState:
+        """Load a market state from the cache, or from the connection when it is missing or too stale."""
+        key = self.__key(market_address, program_id)
+        cached = self.__cached(key)
+        if cached is not None:
+            bytes_data, age = cached
+            if self.max_stale is None or age <= self.max_stale:
+                state = self.__make_state(bytes_data, program_id)
+                if state is not None:
+                    if self.revalidate and age > self.max_age and self.__start_revalidation(key):
+                        self.__revalidate_in_task(conn, market_address, program_id)
+                    return state
+        return await self.__async_fetch(conn, market_address, program_id)
+
+    def get_mint_decimals(self, conn: Client, mint: PublicKey) -> int:
+        """Get the decimals of a mint, loading them only once as they never change."""
+        self.__read()
+        decimals = self._mints.get(str(mint))
+        if decimals is None:
+            decimals = utils.get_mint_decimals(conn, mint)
+            self.__store_mint(mint, decimals)
+        return decimals
+
+    async def async_get_mint_decimals(self, conn: AsyncClient, mint: PublicKey) -> int:
+        """Get the decimals of a mint, loading them only once as they never change."""
+        self.__read()
+        decimals = self._mints.get(str(mint))
+        if decimals is None:
+            decimals = await async_utils.get_mint_decimals(conn, mint)
+            self.__store_mint(mint, decimals)
+        return decimals
+
+    def invalidate(self, market_address: PublicKey, program_id: PublicKey) -> None:
+        """Drop a market from the cache, the next load goes to the connection."""
+        self.__read()
+        with self._lock:
+            assert self._markets is not None
+            if self._markets.pop(self.__key(market_address, program_id), None) is not None:
+                self.__write()
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """Wait for the revalidations running in background threads."""
+        for thread in list(self._threads):
+            thread.join(timeout)
+
+    def __fetch(self, conn: Client, market_address: PublicKey, program_id: PublicKey) -> MarketState:
+        bytes_data = utils.load_bytes_data(market_address, conn)
+        parsed_market = MARKET_LAYOUT.parse(bytes_data)
+        base_mint_decimals = self.get_mint_decimals(conn, PublicKey(parsed_market.base_mint))
+        quote_mint_decimals = self.get_mint_decimals(conn, PublicKey(parsed_market.quote_mint))
+        state = MarketState.from_bytes(program_id, base_mint_decimals, quote_mint_decimals, bytes_data)
+        self.__store_market(self.__key(market_address, program_id), bytes_data)
+        return state
+
+    async def __async_fetch(self, conn: AsyncClient, market_address: PublicKey, program_id: PublicKey) -> MarketState:
+        bytes_data = await async_utils.load_bytes_data(market_address, conn)
+        parsed_market = MARKET_LAYOUT.parse(bytes_data)
+        base_mint_decimals = await self.async_get_mint_decimals(conn, PublicKey(parsed_market.base_mint))
+        quote_mint_decimals = await self.async_get_mint_decimals(conn, PublicKey(parsed_market.quote_mint))
+        state = MarketState.from_bytes(program_id, base_mint_decimals, quote_mint_decimals, bytes_data)
+        self.__store_market(self.__key(market_address, program_id), bytes_data)
+        return state
+
+    def __start_revalidation(self, key: str) -> bool:
+        """Mark a market as being revalidated, False if it already is."""
+        with self._lock:
+            if key in self._revalidating:
+                return False
+            self._revalidating.add(key)
+            return True
+
+    def __revalidate_in_thread(self, conn: Client, market_address: PublicKey, program_id: PublicKey) -> None:
+        def revalidate() -> None:
+            try:
+                self.__fetch(conn, market_address, program_id)
+            except Exception:  # pylint: disable=broad-except
+                # The cached entry stays in use, it is revalidated again on the next load.
+                pass
+            finally:
+                self._revalidating.discard(self.__key(market_address, program_id))
+                self._threads.discard(threading.current_thread())
+
+        thread = threading.Thread(target=revalidate, daemon=True)
+        self._threads.add(thread)
+        thread.start()
+
+    def __revalidate_in_task(self, conn: AsyncClient, market_address: PublicKey, program_id: PublicKey) -> None:
+        async def revalidate() -> None:
+            try:
+                await self.__async_fetch(conn, market_address, program_id)
+            except Exception:  # pylint: disable=broad-except
+                # The cached entry stays in use, it is revalidated again on the next load.
+                pass
+            finally:
+                self._revalidating.discard(self.__key(market_address, program_id))
+
+        task = asyncio.ensure_future(revalidate())
+        # The event loop only keeps weak references to tasks, hold on to it until it is done.
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def __make_state(self, bytes_data: bytes, program_id: PublicKey) -> Optional[MarketState]:
+        """Build a market state from cached data, None if the decimals of one of its mints are not cached."""
+        parsed_market = MARKET_LAYOUT.parse(bytes_data)
+        base_mint_decimals = self._mints.get(str(PublicKey(parsed_market.base_mint)))
+        quote_mint_decimals = self._mints.get(str(PublicKey(parsed_market.quote_mint)))
+        if base_mint_decimals is None or quote_mint_decimals is None:
+            return None
+        return MarketState.from_bytes(program_id, base_mint_decimals, quote_mint_decimals, bytes_data)
+
+    @staticmethod
+    def __key(market_address: PublicKey, program_id: PublicKey) -> str:
+        return f"{program_id}:{market_address}"
+
+    def __cached(self, key: str) -> Optional[Tuple[bytes, float]]:
+        self.__read()
+        assert self._markets is not None
+        entry = self._markets.get(key)
+        if entry is None:
+            return None
+        return base64.b64decode(entry["data"]), time.time() - entry["fetched_at"]
+
+    def __store_market(self, key: str, bytes_data: bytes) -> None:
+        with self._lock:
+            assert self._markets is not None
+            self._markets[key] = dict(data=base64.b64encode(bytes_data).decode("ascii"), fetched_at=time.time())
+            self.__write()
+
+    def __store_mint(self, mint: PublicKey, decimals: int) -> None:
+        with self._lock:
+            self._mints[str(mint)] = decimals
+            self.__write()
+
+    def __read(self) -> None:
+        """Read the cache file on first use, starting empty if it is missing or unreadable."""
+        if self._markets is not None:
+            return
+        with self._lock:
+            if self._markets is not None:
+                return
+            try:
+                with open(self.path, "r") as cache_file:
+                    content = json.load(cache_file)
+                if content.get("version") != self.VERSION:
+                    raise ValueError("Unsupported market cache version.")
+                self._mints = dict(content["mints"])
+                self._markets = dict(content["markets"])
+            except (OSError, ValueError, KeyError, TypeError):
+                self._mints = {}
+                self._markets = {}
+
+    def __write(self) -> None:
+        """Write the cache file atomically, so that a crash or a concurrent reader never sees a partial file."""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        content = dict(version=self.VERSION, markets=self._markets, mints=self._mints)
+        with tempfile.NamedTemporaryFile("w", dir=directory, suffix=".tmp", delete=False) as cache_file:
+            json.dump(content, cache_file)
+        os.replace(cache_file.name, self.path)
@@ -1,9 +1,9 @@
 """Market module to interact with Serum DEX."""
 from __future__ import annotations
 
-import itertools
 import logging
-from typing import List, Union
+import time
+from typing import Dict, List, Optional, Tuple, Union
 
 from solana.keypair import Keypair
 from solana.publickey import PublicKey
@@ -16,10 +16,12 @@ from spl.token.instructions import CloseAccountParams, InitializeAccountParams,
 import pyserum.market.types as t
 from pyserum import instructions
 
+from .._layouts.queue import EVENT_BID_FLAG, EVENT_FILL_FLAG, EVENT_MAKER_FLAG
+from .._numpy import require_numpy
 from ..async_open_orders_account import AsyncOpenOrdersAccount
 from ..enums import OrderType, SelfTradeBehavior, Side
 from ..open_orders_account import OpenOrdersAccount, make_create_account_instruction
-from ._internal.queue import decode_event_queue
+from ._internal.queue import decode_event_queue, decode_event_queue_array
 from .orderbook import OrderBook
 from .state import MarketState
 
@@ -35,6 +37,11 @@ class MarketCore:
     def __init__(self, market_state: MarketState, force_use_request_queue: bool = False) -> None:
         self.state = market_state
         self.force_use_request_queue = force_use_request_queue
+        # Seconds for which place_order reuses a known open orders address instead of looking it up again, except for
+        # orders that wrap SOL as they need the free balances of the account.
+        self.open_orders_cache_ttl = 60.0
+        # Open orders address used by each owner, with the time it was cached, keyed by the base 58 owner address.
+        self._open_orders_addresses: Dict[str, Tuple[PublicKey, float]] = {}
 
     def _use_request_queue(self) -> bool:
         return (
@@ -49,6 +56,22 @@ class MarketCore:
             or self.force_use_request_queue
         )
 
+    def invalidate_open_orders_cache(self, owner: Optional[PublicKey] = None) -> None:
+        """Forget the open orders address cached for an owner, or for every owner."""
+        if owner is None:
+            self._open_orders_addresses.clear()
+        else:
+            self._open_orders_addresses.pop(str(owner), None)
+
+    def _cached_open_orders_address(self, owner: PublicKey) -> Optional[PublicKey]:
+        cached = self._open_orders_addresses.get(str(owner))
+        if cached is None or time.monotonic() - cached[1] > self.open_orders_cache_ttl:
+            return None
+        return cached[0]
+
+    def _cache_open_orders_address(self, owner: PublicKey, address: PublicKey) -> None:
+        self._open_orders_addresses[str(owner)] = (address, time.monotonic())
+
     def support_srm_fee_discounts(self) -> bool:
         raise NotImplementedError("support_srm_fee_discounts not implemented")
 
@@ -61,29 +84,74 @@ class MarketCore:
     def find_quote_token_accounts_for_owner(self, owner_address: PublicKey, include_unwrapped_sol: bool = False):
         raise NotImplementedError("find_quote_token_accounts_for_owner not implemented")
 
-    def _parse_bids_or_asks(self, bytes_data: bytes) -> OrderBook:
-        return OrderBook.from_bytes(self.state, bytes_data)
+    def _parse_bids_or_asks(self, bytes_data: bytes, lazy: bool = False) -> OrderBook:
+        return OrderBook.from_bytes(self.state, bytes_data, lazy)
 
     @staticmethod
     def _parse_orders_for_owner(bids, asks, open_orders_accounts) -> List[t.Order]:
         if not open_orders_accounts:
             return []
 
-        all_orders = itertools.chain(bids.orders(), asks.orders())
-        open_orders_addresses = {str(o.address) for o in open_orders_accounts}
-        orders = [o for o in all_orders if str(o.open_order_address) in open_orders_addresses]
-        return orders
+        open_orders_addresses = [o.address for o in open_orders_accounts]
+        return bids.orders_for_owner(open_orders_addresses) + asks.orders_for_owner(open_orders_addresses)
+
+    def _order_ids_by_side(
+        self, open_orders_accounts: Union[List[OpenOrdersAccount], List[AsyncOpenOrdersAccount]]
+    ) -> Tuple[List[int], List[int]]:
+        market = bytes(self.state.public_key())
+        bid_ids: List[int] = []
+        ask_ids: List[int] = []
+        for open_orders_account in open_orders_accounts:
+            # Order ids are only unique within a market, the ids of another market would match unrelated orders.
+            if bytes(open_orders_account.market) != market:
+                continue
+            for order in open_orders_account.active_orders():
+                (bid_ids if order.side == Side.BUY else ask_ids).append(order.order_id)
+        return bid_ids, ask_ids
+
+    @staticmethod
+    def _orders_placed_from(
+        orders: List[t.Order], open_orders_accounts: Union[List[OpenOrdersAccount], List[AsyncOpenOrdersAccount]]
+    ) -> List[t.Order]:
+        """Keep only the orders placed from one of the accounts, an order id alone does not tell who placed it."""
+        addresses = {bytes(open_orders_account.address) for open_orders_account in open_orders_accounts}
+        return [order for order in orders if bytes(order.open_order_address) in addresses]
 
     def load_base_token_for_owner(self):
         raise NotImplementedError("load_base_token_for_owner not implemented")
 
     def _parse_fills(self, bytes_data: bytes, limit: int) -> List[t.FilledOrder]:
-        events = decode_event_queue(bytes_data, limit)
-        return [
-            self.parse_fill_event(event)
-            for event in events
-            if event.event_flags.fill and event.native_quantity_paid > 0
-        ]
+        events = decode_event_queue(bytes_data, limit, fills_only=True)
+        return [self.parse_fill_event(event) for event in events if event.native_quantity_paid > 0]
+
+    def parse_fills_array(self, bytes_data: bytes, limit: Optional[int] = None) -> t.FillArrays:
+        """Vectorized `_parse_fills`, the fills of the event queue as column arrays.
+
+        Requires the optional NumPy dependency.
+        """
+        np = require_numpy()
+        events = decode_event_queue_array(bytes_data, limit)
+        events = events[((events["event_flags"] & EVENT_FILL_FLAG) != 0) & (events["native_quantity_paid"] > 0)]
+        bid = (events["event_flags"] & EVENT_BID_FLAG) != 0
+        maker = (events["event_flags"] & EVENT_MAKER_FLAG) != 0
+        released = events["native_quantity_released"].astype(np.int64)
+        paid = events["native_quantity_paid"].astype(np.int64)
+        fee = events["native_fee_or_rebate"].astype(np.int64)
+        # Maker bids and taker asks add the fee back to get the price before fees, the other two remove it.
+        price_before_fees = np.where(bid == maker, released + fee, released - fee)
+        base_multiplier = self.state.base_spl_token_multiplier()
+        quote_multiplier = self.state.quote_spl_token_multiplier()
+        return t.FillArrays(
+            side=np.where(bid, np.uint8(Side.BUY), np.uint8(Side.SELL)),
+            maker=maker,
+            price=price_before_fees * base_multiplier / (quote_multiplier * paid.astype(np.float64)),
+            size=paid / base_multiplier,
+            fee_cost=np.where(maker, fee, -fee),
+            order_id_high=events["order_id_high"],
+            order_id_low=events["order_id_low"],
+            client_order_id=events["client_order_id"],
+            owner=events["public_key"],
+        )
 
     def parse_fill_event(self, event: t.Event) -> t.FilledOrder:
         if event.event_flags.bid:
@@ -128,6 +196,7 @@ class MarketCore:
             )
         )
         signers.append(new_open_orders_account)
+        self._cache_open_orders_address(owner.public_key, place_order_open_order_account)
         return place_order_open_order_account
 
     def _prepare_order_transaction(  # pylint: disable=too-many-arguments,too-many-locals
@@ -149,9 +218,7 @@ class MarketCore:
             raise ValueError("Invalid payer account. Cannot use unwrapped SOL.")
 
         # TODO: add integration test for SOL wrapping.
-        should_wrap_sol = (side == Side.BUY and self.state.quote_mint() == WRAPPED_SOL_MINT) or (
-            side == Side.SELL and self.state.base_mint() == WRAPPED_SOL_MINT
-        )
+        should_wrap_sol = self._place_order_should_wrap_sol(side)
 
         if should_wrap_sol:
             # wrapped_sol_account = Account()
@@ -207,6 +274,11 @@ class MarketCore:
                 )
             )
 
+    def _place_order_should_wrap_sol(self, side: Side) -> bool:
+        return (side == Side.BUY and self.state.quote_mint() == WRAPPED_SOL_MINT) or (
+            side == Side.SELL and self.state.base_mint() == WRAPPED_SOL_MINT
+        )
+
     def _after_oo_mbfre_resp(
         self, mbfre_resp: RPCResponse, owner: Keypair, signers: List[Keypair], transaction: Transaction
     ) -> PublicKey:
@@ -1,7 +1,7 @@
 """Market module to interact with Serum DEX."""
 from __future__ import annotations
 
-from typing import List
+from typing import List, Optional, Sequence
 
 from solana.keypair import Keypair
 from solana.publickey import PublicKey
@@ -16,7 +16,8 @@ from .._layouts.open_orders import OPEN_ORDERS_LAYOUT
 from ..enums import OrderType, Side
 from ..open_orders_account import OpenOrdersAccount
 from ..utils import load_bytes_data
-from ._internal.queue import decode_event_queue, decode_request_queue
+from ._internal.queue import EventQueueCursor, decode_event_queue, decode_request_queue
+from .cache import MarketCache
 from .core import MarketCore
 from .orderbook import OrderBook
 from .state import MarketState
@@ -40,30 +41,55 @@ class Market(MarketCore):
         market_address: PublicKey,
         program_id: PublicKey = instructions.DEFAULT_DEX_PROGRAM_ID,
         force_use_request_queue: bool = False,
+        cache: Optional[MarketCache] = None,
     ) -> Market:
         """Factory method to create a Market.
 
         :param conn: The connection that we use to load the data, created from `solana.rpc.api`.
         :param market_address: The market address that you want to connect to.
         :param program_id: The program id of the given market, it will use the default value if not provided.
+        :param cache: An optional on-disk cache of the market data, to load the market without any request.
         """
-        market_state = MarketState.load(conn, market_address, program_id)
+        if cache is not None:
+            market_state = cache.load(conn, market_address, program_id)
+        else:
+            market_state = MarketState.load(conn, market_address, program_id)
         return cls(conn, market_state, force_use_request_queue)
 
+    @classmethod
+    def load_many(
+        cls,
+        conn: Client,
+        market_addresses: Sequence[PublicKey],
+        program_id: PublicKey = instructions.DEFAULT_DEX_PROGRAM_ID,
+        force_use_request_queue: bool = False,
+    ) -> List[Market]:
+        """Factory method to create many markets with batched requests instead of three requests per market.
+
+        :param conn: The connection that we use to load the data, created from `solana.rpc.api`.
+        :param market_addresses: The addresses of the markets, in the order of the returned markets.
+        :param program_id: The program id of the given markets, it will use the default value if not provided.
+        """
+        market_states = MarketState.load_many(conn, market_addresses, program_id)
+        return [cls(conn, market_state, force_use_request_queue) for market_state in market_states]
+
     def find_open_orders_accounts_for_owner(self, owner_address: PublicKey) -> List[OpenOrdersAccount]:
-        return OpenOrdersAccount.find_for_market_and_owner(
+        accounts = OpenOrdersAccount.find_for_market_and_owner(
             self._conn, self.state.public_key(), owner_address, self.state.program_id()
         )
+        if accounts:
+            self._cache_open_orders_address(owner_address, accounts[0].address)
+        return accounts
 
-    def load_bids(self) -> OrderBook:
+    def load_bids(self, lazy: bool = False) -> OrderBook:
         """Load the bid order book"""
         bytes_data = load_bytes_data(self.state.bids(), self._conn)
-        return self._parse_bids_or_asks(bytes_data)
+        return self._parse_bids_or_asks(bytes_data, lazy)
 
-    def load_asks(self) -> OrderBook:
+    def load_asks(self, lazy: bool = False) -> OrderBook:
         """Load the ask order book."""
         bytes_data = load_bytes_data(self.state.asks(), self._conn)
-        return self._parse_bids_or_asks(bytes_data)
+        return self._parse_bids_or_asks(bytes_data, lazy)
 
     def load_orders_for_owner(self, owner_address: PublicKey) -> List[t.Order]:
         """Load orders for owner."""
@@ -72,6 +98,20 @@ class Market(MarketCore):
         open_orders_accounts = self.find_open_orders_accounts_for_owner(owner_address)
         return self._parse_orders_for_owner(bids, asks, open_orders_accounts)
 
+    def load_orders_for_open_orders_accounts(self, open_orders_accounts: List[OpenOrdersAccount]) -> List[t.Order]:
+        """Load the orders held in the slots of the given open orders accounts.
+
+        Each order is looked up by id in the book of its side instead of scanning both books, and a side is not
+        loaded at all when none of the accounts has an order on it. Accounts of other markets are ignored.
+        """
+        bid_ids, ask_ids = self._order_ids_by_side(open_orders_accounts)
+        orders: List[t.Order] = []
+        if bid_ids:
+            orders += self.load_bids(lazy=True).find_by_order_ids(bid_ids)
+        if ask_ids:
+            orders += self.load_asks(lazy=True).find_by_order_ids(ask_ids)
+        return self._orders_placed_from(orders, open_orders_accounts)
+
     def load_event_queue(self) -> List[t.Event]:
         """Load the event queue which includes the fill item and out item. For any trades two fill items are added to
         the event queue. And in case of a trade, cancel or IOC order that missed, out items are added to the event
@@ -80,6 +120,11 @@ class Market(MarketCore):
         bytes_data = load_bytes_data(self.state.event_queue(), self._conn)
         return decode_event_queue(bytes_data)
 
+    def load_event_queue_since(self, cursor: EventQueueCursor) -> t.EventQueueUpdate:
+        """Load only the events added to the event queue since the cursor was last updated, and advance it."""
+        bytes_data = load_bytes_data(self.state.event_queue(), self._conn)
+        return cursor.update(bytes_data)
+
     def load_request_queue(self) -> List[t.Request]:
         bytes_data = load_bytes_data(self.state.request_queue(), self._conn)
         return decode_request_queue(bytes_data)
@@ -88,6 +133,11 @@ class Market(MarketCore):
         bytes_data = load_bytes_data(self.state.event_queue(), self._conn)
         return self._parse_fills(bytes_data, limit)
 
+    def load_fills_array(self, limit=100) -> t.FillArrays:
+        """Load the fills as NumPy column arrays, requires the optional NumPy dependency."""
+        bytes_data = load_bytes_data(self.state.event_queue(), self._conn)
+        return self.parse_fills_array(bytes_data, limit)
+
     def place_order(  # pylint: disable=too-many-arguments,too-many-locals
         self,
         payer: PublicKey,
@@ -101,15 +151,22 @@ class Market(MarketCore):
     ) -> RPCResponse:  # TODO: Add open_orders_address_key param and fee_discount_pubkey
         transaction = Transaction()
         signers: List[Keypair] = [owner]
-        open_order_accounts = self.find_open_orders_accounts_for_owner(owner.public_key)
-        if open_order_accounts:
-            place_order_open_order_account = open_order_accounts[0].address
+        # Wrapping SOL deducts the free balance of the open orders account, which is not cached, so it is looked up.
+        cached_open_order_account = (
+            None if self._place_order_should_wrap_sol(side) else self._cached_open_orders_address(owner.public_key)
+        )
+        if cached_open_order_account is not None:
+            open_order_accounts = []
+            place_order_open_order_account = cached_open_order_account
         else:
-            mbfre_resp = self._conn.get_minimum_balance_for_rent_exemption(OPEN_ORDERS_LAYOUT.sizeof())
-            place_order_open_order_account = self._after_oo_mbfre_resp(
-                mbfre_resp=mbfre_resp, owner=owner, signers=signers, transaction=transaction
-            )
-            # TODO: Cache new_open_orders_account
+            open_order_accounts = self.find_open_orders_accounts_for_owner(owner.public_key)
+            if open_order_accounts:
+                place_order_open_order_account = open_order_accounts[0].address
+            else:
+                mbfre_resp = self._conn.get_minimum_balance_for_rent_exemption(OPEN_ORDERS_LAYOUT.sizeof())
+                place_order_open_order_account = self._after_oo_mbfre_resp(
+                    mbfre_resp=mbfre_resp, owner=owner, signers=signers, transaction=transaction
+                )
         # TODO: Handle fee_discount_pubkey
 
         self._prepare_order_transaction(
@@ -125,7 +182,12 @@ class Market(MarketCore):
             open_order_accounts=open_order_accounts,
             place_order_open_order_account=place_order_open_order_account,
         )
-        return self._conn.send_transaction(transaction, *signers, opts=opts)
+        try:
+            return self._conn.send_transaction(transaction, *signers, opts=opts)
+        except Exception:
+            # The cached account may be gone, or the new one may never have been created.
+            self.invalidate_open_orders_cache(owner.public_key)
+            raise
 
     def cancel_order_by_client_id(
         self, owner: Keypair, open_orders_account: PublicKey, client_id: int, opts: TxOpts = TxOpts()
@@ -1,20 +1,31 @@
 from __future__ import annotations
 
-from typing import Iterable, List, Union
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from solana.publickey import PublicKey
 
 import pyserum.market.types as t
 
+from .._layouts.slab import NodeType
+from .._numpy import require_numpy
 from ..enums import Side
-from ._internal.slab import Slab, SlabInnerNode, SlabLeafNode
+from ._internal.slab import Slab, SlabDelta, SlabInnerNode, SlabLeafNode, diff
 from .state import MarketState
 
 
+class _OrderBookIndexes(NamedTuple):
+    by_owner: Dict[bytes, List[SlabLeafNode]]
+    by_client_id: Dict[int, List[SlabLeafNode]]
+    by_order_id: Dict[int, SlabLeafNode]
+
+
 class OrderBook:
     """Represents an order book."""
 
     _market_state: MarketState
     _is_bids: bool
     _slab: Slab
+    _indexes: Optional[_OrderBookIndexes]
 
     def __init__(self, market_state: MarketState, account_flags: t.AccountFlags, slab: Slab) -> None:
         if not account_flags.initialized or not account_flags.bids ^ account_flags.asks:
@@ -22,6 +33,7 @@ class OrderBook:
         self._market_state = market_state
         self._is_bids = account_flags.bids
         self._slab = slab
+        self._indexes = None
 
     @staticmethod
     def __get_price_from_slab(node: Union[SlabInnerNode, SlabLeafNode]) -> int:
@@ -32,16 +44,33 @@ class OrderBook:
         return node.key >> 64
 
     @staticmethod
-    def from_bytes(market_state: MarketState, buffer: bytes) -> OrderBook:
-        """Decode the given buffer into an order book."""
+    def from_bytes(market_state: MarketState, buffer: bytes, lazy: bool = False) -> OrderBook:
+        """Decode the given buffer into an order book.
+
+        With `lazy` set, slab nodes are decoded only when a query reaches them, which makes shallow reads such as
+        `get_l2(5)` cost a handful of node decodes instead of the whole account.
+        """
         # This is a bit hacky at the moment. The first 5 bytes are padding, the
         # total length is 8 bytes which is 5 + 8 = 13 bytes.
         account_flags = t.AccountFlags.from_bytes(buffer[5:13])
-        slab = Slab.from_bytes(buffer[13:])
+        slab = Slab.from_bytes(memoryview(buffer)[13:], lazy)
         return OrderBook(market_state, account_flags, slab)
 
     def get_l2(self, depth: int) -> List[t.OrderInfo]:
         """Get the Level 2 market information."""
+        return self.best_n_levels(depth)
+
+    def best(self) -> Optional[t.Order]:
+        """Get the best priced order, the highest bid or the lowest ask.
+
+        Only the nodes on the path from the root to that order are visited, so on a lazily decoded book this
+        costs as many node decodes as the tree is high.
+        """
+        node = self._slab.max_leaf() if self._is_bids else self._slab.min_leaf()
+        return None if node is None else self.__make_order(node)
+
+    def best_n_levels(self, depth: int) -> List[t.OrderInfo]:
+        """Get the best `depth` price levels, the traversal stops at the first order past the last level."""
         descending = self._is_bids
         # The first element of the inner list is price, the second is quantity.
         levels: List[List[int]] = []
@@ -63,25 +92,161 @@ class OrderBook:
             for price_lots, size_lots in levels
         ]
 
+    def size_within(self, price: float) -> float:
+        """Get the total size of the orders priced at `price` or better."""
+        price_lots = self._market_state.price_number_to_lots(price)
+        # Rounding to the nearest lot may land past an off-tick limit, step back to the last tick within it.
+        if self._is_bids:
+            if self._market_state.price_lots_to_number(price_lots) < price:
+                price_lots += 1
+            nodes = self._slab.range(price_lots << 64, (1 << 128) - 1)
+        else:
+            if self._market_state.price_lots_to_number(price_lots) > price:
+                price_lots -= 1
+            nodes = self._slab.range(0, ((price_lots + 1) << 64) - 1)
+        return self._market_state.base_size_lots_to_number(sum(node.quantity for node in nodes))
+
+    def price_for_size(self, size: float) -> Optional[float]:
+        """Get the worst price reached when filling `size` against the book, None if the book is too thin."""
+        fills = self.__fill(size)
+        return None if fills is None else self._market_state.price_lots_to_number(fills[-1][0])
+
+    def vwap(self, size: float) -> Optional[float]:
+        """Get the volume weighted average price of filling `size` against the book, None if the book is too thin."""
+        fills = self.__fill(size)
+        if fills is None:
+            return None
+        notional = sum(
+            self._market_state.price_lots_to_number(price_lots) * size_lots for price_lots, size_lots in fills
+        )
+        return notional / sum(size_lots for _, size_lots in fills)
+
+    def __fill(self, size: float) -> Optional[List[Tuple[int, int]]]:
+        """Price and size in lots taken from each order, best first, until `size` is filled."""
+        remaining = self._market_state.base_size_number_to_lots(size)
+        if remaining <= 0:
+            raise ValueError("Size should be at least one base lot.")
+        fills: List[Tuple[int, int]] = []
+        for node in self._slab.items(self._is_bids):
+            taken = min(remaining, node.quantity)
+            fills.append((self.__get_price_from_slab(node), taken))
+            remaining -= taken
+            if remaining == 0:
+                return fills
+        return None
+
+    def get_l2_arrays(self, depth: Optional[int] = None) -> t.L2Arrays:
+        """Get the Level 2 market information as arrays, aggregated with NumPy instead of a loop per level.
+
+        All levels are returned when `depth` is not given. Requires the optional NumPy dependency.
+        """
+        np = require_numpy()
+        nodes = self._slab.as_numpy()
+        leaves = nodes[nodes["tag"] == NodeType.LEAF_NODE]
+        price_lots = leaves["key_high"].astype(np.int64)
+        order = np.argsort(price_lots, kind="stable")
+        price_lots = price_lots[order]
+        size_lots = leaves["quantity"].astype(np.int64)[order]
+        if len(price_lots) > 0:
+            price_lots, starts = np.unique(price_lots, return_index=True)
+            size_lots = np.add.reduceat(size_lots, starts)
+        if self._is_bids:
+            price_lots = price_lots[::-1]
+            size_lots = size_lots[::-1]
+        if depth is not None:
+            price_lots = price_lots[:depth]
+            size_lots = size_lots[:depth]
+        price_lots = np.ascontiguousarray(price_lots)
+        size_lots = np.ascontiguousarray(size_lots)
+        return t.L2Arrays(
+            price=self._market_state.price_lots_to_number_array(price_lots),
+            size=self._market_state.base_size_lots_to_number_array(size_lots),
+            price_lots=price_lots,
+            size_lots=size_lots,
+        )
+
+    def diff(self, previous: OrderBook) -> Iterator[SlabDelta]:
+        """Get the orders added, removed or resized since a previous snapshot of the same side of the book."""
+        if previous._is_bids != self._is_bids:  # pylint: disable=protected-access
+            raise ValueError("Cannot diff bids against asks.")
+        return diff(previous._slab.buffer(), self._slab.buffer())  # pylint: disable=protected-access
+
     def __iter__(self) -> Iterable[t.Order]:
         return self.orders()
 
     def orders(self) -> Iterable[t.Order]:
         for node in self._slab.items():
-            price = self.__get_price_from_slab(node)
-            open_orders_address = node.owner
-
-            yield t.Order(
-                order_id=node.key,
-                client_id=node.client_order_id,
-                open_order_address=open_orders_address,
-                fee_tier=node.fee_tier,
-                info=t.OrderInfo(
-                    price=self._market_state.price_lots_to_number(price),
-                    price_lots=price,
-                    size=self._market_state.base_size_lots_to_number(node.quantity),
-                    size_lots=node.quantity,
-                ),
-                side=Side.BUY if self._is_bids else Side.SELL,
-                open_order_slot=node.owner_slot,
-            )
+            yield self.__make_order(node)
+
+    def orders_for_owner(self, open_orders_addresses: Iterable[PublicKey]) -> List[t.Order]:
+        """Get the orders placed from any of the given open orders accounts, in book order."""
+        by_owner = self.__indexes().by_owner
+        addresses = {bytes(address) for address in open_orders_addresses}
+        nodes = [node for address in addresses for node in by_owner.get(address, [])]
+        return [self.__make_order(node) for node in sorted(nodes, key=lambda node: node.key)]
+
+    def find_by_client_id(self, client_id: int) -> List[t.Order]:
+        """Get the orders with the given client order id, there can be several as ids are chosen by each client."""
+        return [self.__make_order(node) for node in self.__indexes().by_client_id.get(client_id, [])]
+
+    def find_by_order_id(self, order_id: int) -> Optional[t.Order]:
+        """Get the order with the given order id."""
+        node = self.__indexes().by_order_id.get(order_id)
+        return None if node is None else self.__make_order(node)
+
+    def find_by_order_ids(self, order_ids: Iterable[int]) -> List[t.Order]:
+        """Get the orders with any of the given order ids in book order, with one shared walk down the tree.
+
+        Only the nodes on the paths to the ids are visited, which makes this cheap on a lazily decoded book.
+        """
+        nodes = self._slab.get_many(order_ids)
+        return [self.__make_order(nodes[key]) for key in sorted(nodes)]
+
+    def __indexes(self) -> _OrderBookIndexes:
+        """Hash indexes of the leaves, built in a single pass on first use and shared by every later lookup."""
+        if self._indexes is None:
+            indexes = _OrderBookIndexes(by_owner={}, by_client_id={}, by_order_id={})
+            for node in self._slab.items():
+                indexes.by_owner.setdefault(node.owner_bytes, []).append(node)
+                indexes.by_client_id.setdefault(node.client_order_id, []).append(node)
+                indexes.by_order_id[node.key] = node
+            self._indexes = indexes
+        return self._indexes
+
+    def __make_order(self, node: SlabLeafNode) -> t.Order:
+        price = self.__get_price_from_slab(node)
+        return t.Order(
+            order_id=node.key,
+            client_id=node.client_order_id,
+            open_order_address=node.owner,
+            fee_tier=node.fee_tier,
+            info=t.OrderInfo(
+                price=self._market_state.price_lots_to_number(price),
+                price_lots=price,
+                size=self._market_state.base_size_lots_to_number(node.quantity),
+                size_lots=node.quantity,
+            ),
+            side=Side.BUY if self._is_bids else Side.SELL,
+            open_order_slot=node.owner_slot,
+        )
+
+    def to_arrays(self) -> t.OrderArrays:
+        """Get the orders as NumPy column arrays, without building an object per order.
+
+        Requires the optional NumPy dependency.
+        """
+        np = require_numpy()
+        nodes = self._slab.as_numpy()
+        leaves = nodes[nodes["tag"] == NodeType.LEAF_NODE]
+        leaves = leaves[np.lexsort((leaves["key_low"], leaves["key_high"]))]
+        # Bids store the bitwise not of the sequence number so that older orders sort first when descending.
+        sequence = ~leaves["key_low"] if self._is_bids else leaves["key_low"].copy()
+        return t.OrderArrays(
+            price_lots=leaves["key_high"].astype(np.int64),
+            sequence=sequence,
+            quantity=leaves["quantity"].astype(np.int64),
+            owner_slot=leaves["owner_slot"].copy(),
+            fee_tier=leaves["fee_tier"].copy(),
+            client_order_id=leaves["client_order_id"].copy(),
+            owner=leaves["owner"].copy(),
+        )
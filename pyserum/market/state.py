@@ -1,26 +1,98 @@
 from __future__ import annotations
 
 import math
+from typing import Dict, List, NamedTuple, Optional, Sequence
 
 from construct import Container, Struct
 from solana.publickey import PublicKey
 from solana.rpc.api import Client
 from solana.rpc.async_api import AsyncClient
+from spl.token.constants import WRAPPED_SOL_MINT
 
 from pyserum import async_utils, utils
+from pyserum.utils import intern_public_key
 
 from .._layouts.market import MARKET_LAYOUT
+from .._numpy import NDArray, require_numpy
 from .types import AccountFlags
 
 
-class MarketState:  # pylint: disable=too-many-public-methods
+class _MarketRecord(NamedTuple):
+    """Decoded market account, with addresses as public keys."""
+
+    account_flags: AccountFlags
+    own_address: PublicKey
+    vault_signer_nonce: int
+    base_mint: PublicKey
+    quote_mint: PublicKey
+    base_vault: PublicKey
+    base_deposits_total: int
+    base_fees_accrued: int
+    quote_vault: PublicKey
+    quote_deposits_total: int
+    quote_fees_accrued: int
+    quote_dust_threshold: int
+    request_queue: PublicKey
+    event_queue: PublicKey
+    bids: PublicKey
+    asks: PublicKey
+    base_lot_size: int
+    quote_lot_size: int
+    fee_rate_bps: int
+    referrer_rebate_accrued: int
+
+    @classmethod
+    def from_container(cls, parsed_market: Container) -> _MarketRecord:
+        values = {name: parsed_market[name] for name in cls._fields}
+        for name in _PUBLIC_KEY_FIELDS:
+            values[name] = intern_public_key(values[name])
+        flags = values["account_flags"]
+        values["account_flags"] = AccountFlags(*(getattr(flags, name) for name in AccountFlags._fields))
+        return cls(**values)
+
+
+_PUBLIC_KEY_FIELDS = (
+    "own_address",
+    "base_mint",
+    "quote_mint",
+    "base_vault",
+    "quote_vault",
+    "request_queue",
+    "event_queue",
+    "bids",
+    "asks",
+)
+
+
+class MarketState:  # pylint: disable=too-many-public-methods,too-many-instance-attributes
+    __slots__ = (
+        "_record",
+        "_program_id",
+        "_base_mint_decimals",
+        "_quote_mint_decimals",
+        "_base_multiplier",
+        "_quote_multiplier",
+        "_base_lot_size",
+        "_quote_lot_size",
+        "_price_lots_numerator",
+        "_price_lots_denominator",
+    )
+
     def __init__(
         self, parsed_market: Container, program_id: PublicKey, base_mint_decimals: int, quote_mint_decimals: int
     ) -> None:
-        self._decoded = parsed_market
+        # The market is decoded once into an immutable record, so accessors do not build public keys on every call.
+        self._record = _MarketRecord.from_container(parsed_market)
         self._program_id = program_id
         self._base_mint_decimals = base_mint_decimals
         self._quote_mint_decimals = quote_mint_decimals
+        # Conversion factors between lots and numbers, computed once as they are used for every order and level.
+        self._base_multiplier = 10**base_mint_decimals
+        self._quote_multiplier = 10**quote_mint_decimals
+        self._base_lot_size = self._record.base_lot_size
+        self._quote_lot_size = self._record.quote_lot_size
+        self._price_lots_numerator = self._quote_lot_size * self._base_multiplier
+        self._price_lots_denominator = self._base_lot_size * self._quote_multiplier
 
     @staticmethod
     def LAYOUT() -> Struct:  # pylint: disable=invalid-name
@@ -53,6 +125,66 @@ class MarketState:  # pylint: disable=too-many-public-methods
         quote_mint_decimals = await async_utils.get_mint_decimals(conn, PublicKey(parsed_market.quote_mint))
         return cls(parsed_market, program_id, base_mint_decimals, quote_mint_decimals)
 
+    @classmethod
+    def load_many(cls, conn: Client, market_addresses: Sequence[PublicKey], program_id: PublicKey) -> List[MarketState]:
+        """Load many markets with batched requests, one for every 100 markets and one for every 100 mints."""
+        parsed_markets = cls._parse_many(market_addresses, utils.load_multiple_bytes_data(market_addresses, conn))
+        mints = cls._mints_to_load(parsed_markets)
+        return cls._build_many(parsed_markets, program_id, mints, utils.load_multiple_bytes_data(mints, conn))
+
+    @classmethod
+    async def async_load_many(
+        cls, conn: AsyncClient, market_addresses: Sequence[PublicKey], program_id: PublicKey
+    ) -> List[MarketState]:
+        """Load many markets with batched requests, one for every 100 markets and one for every 100 mints."""
+        market_data = await async_utils.load_multiple_bytes_data(market_addresses, conn)
+        parsed_markets = cls._parse_many(market_addresses, market_data)
+        mints = cls._mints_to_load(parsed_markets)
+        mint_data = await async_utils.load_multiple_bytes_data(mints, conn)
+        return cls._build_many(parsed_markets, program_id, mints, mint_data)
+
+    @classmethod
+    def _parse_many(cls, market_addresses: Sequence[PublicKey], market_data: List[Optional[bytes]]) -> List[Container]:
+        parsed_markets = []
+        for market_address, bytes_data in zip(market_addresses, market_data):
+            if bytes_data is None:
+                raise Exception(f"Cannot load byte data of market {market_address}.")
+            parsed_markets.append(cls._make_parsed_market(bytes_data))
+        return parsed_markets
+
+    @staticmethod
+    def _mints_to_load(parsed_markets: List[Container]) -> List[PublicKey]:
+        """Mints of the markets, each one once, leaving out the wrapped SOL mint whose decimals are known."""
+        mints: Dict[bytes, PublicKey] = {}
+        for parsed_market in parsed_markets:
+            for mint in (parsed_market.base_mint, parsed_market.quote_mint):
+                if mint not in mints and mint != bytes(WRAPPED_SOL_MINT):
+                    mints[mint] = PublicKey(mint)
+        return list(mints.values())
+
+    @classmethod
+    def _build_many(
+        cls,
+        parsed_markets: List[Container],
+        program_id: PublicKey,
+        mints: List[PublicKey],
+        mint_data: List[Optional[bytes]],
+    ) -> List[MarketState]:
+        decimals = {bytes(WRAPPED_SOL_MINT): 9}
+        for mint, bytes_data in zip(mints, mint_data):
+            if bytes_data is None:
+                raise Exception(f"Cannot load byte data of mint {mint}.")
+            decimals[bytes(mint)] = utils.parse_mint_decimals(bytes_data)
+        return [
+            cls(
+                parsed_market,
+                program_id,
+                decimals[parsed_market.base_mint],
+                decimals[parsed_market.quote_mint],
+            )
+            for parsed_market in parsed_markets
+        ]
+
     @classmethod
     def from_bytes(
         cls, program_id: PublicKey, base_mint_decimals: int, quote_mint_decimals: int, buffer: bytes
@@ -69,55 +201,55 @@ class MarketState:  # pylint: disable=too-many-public-methods
         return self._program_id
 
     def public_key(self) -> PublicKey:
-        return PublicKey(self._decoded.own_address)
+        return self._record.own_address
 
     def account_flags(self) -> AccountFlags:
-        return AccountFlags(**self._decoded.account_flags)
+        return self._record.account_flags
 
     def asks(self) -> PublicKey:
-        return PublicKey(self._decoded.asks)
+        return self._record.asks
 
     def bids(self) -> PublicKey:
-        return PublicKey(self._decoded.bids)
+        return self._record.bids
 
     def fee_rate_bps(self) -> int:
-        return self._decoded.fee_rate_bps
+        return self._record.fee_rate_bps
 
     def event_queue(self) -> PublicKey:
-        return PublicKey(self._decoded.event_queue)
+        return self._record.event_queue
 
     def request_queue(self) -> PublicKey:
-        return PublicKey(self._decoded.request_queue)
+        return self._record.request_queue
 
     def vault_signer_nonce(self) -> int:
-        return self._decoded.vault_signer_nonce
+        return self._record.vault_signer_nonce
 
     def base_mint(self) -> PublicKey:
-        return PublicKey(self._decoded.base_mint)
+        return self._record.base_mint
 
     def quote_mint(self) -> PublicKey:
-        return PublicKey(self._decoded.quote_mint)
+        return self._record.quote_mint
 
     def base_vault(self) -> PublicKey:
-        return PublicKey(self._decoded.base_vault)
+        return self._record.base_vault
 
     def quote_vault(self) -> PublicKey:
-        return PublicKey(self._decoded.quote_vault)
+        return self._record.quote_vault
 
     def base_deposits_total(self) -> int:
-        return self._decoded.base_deposits_total
+        return self._record.base_deposits_total
 
     def quote_deposits_total(self) -> int:
-        return self._decoded.quote_deposits_total
+        return self._record.quote_deposits_total
 
     def base_fees_accrued(self) -> int:
-        return self._decoded.base_fees_accrued
+        return self._record.base_fees_accrued
 
     def quote_fees_accrued(self) -> int:
-        return self._decoded.quote_fees_accrued
+        return self._record.quote_fees_accrued
 
     def quote_dust_threshold(self) -> int:
-        return self._decoded.quote_dust_threshold
+        return self._record.quote_dust_threshold
 
     def base_spl_token_decimals(self) -> int:
         return self._base_mint_decimals
@@ -126,44 +258,69 @@ class MarketState:  # pylint: disable=too-many-public-methods
         return self._quote_mint_decimals
 
     def base_spl_token_multiplier(self) -> int:
-        return 10 ** self._base_mint_decimals
+        return self._base_multiplier
 
     def quote_spl_token_multiplier(self) -> int:
-        return 10 ** self._quote_mint_decimals
+        return self._quote_multiplier
 
     def base_spl_size_to_number(self, size: int) -> float:
-        return size / self.base_spl_token_multiplier()
+        return size / self._base_multiplier
 
     def quote_spl_size_to_number(self, size: int) -> float:
-        return size / self.quote_spl_token_multiplier()
+        return size / self._quote_multiplier
 
     def base_lot_size(self) -> int:
-        return self._decoded.base_lot_size
+        return self._base_lot_size
 
     def quote_lot_size(self) -> int:
-        return self._decoded.quote_lot_size
+        return self._quote_lot_size
 
     def price_lots_to_number(self, price: int) -> float:
-        return float(price * self.quote_lot_size() * self.base_spl_token_multiplier()) / (
-            self.base_lot_size() * self.quote_spl_token_multiplier()
-        )
+        return float(price * self._price_lots_numerator) / self._price_lots_denominator
 
     def price_number_to_lots(self, price: float) -> int:
-        return int(
-            round(
-                (price * self.quote_spl_token_multiplier() * self.base_lot_size())
-                / (self.base_spl_token_multiplier() * self.quote_lot_size())
-            )
-        )
+        return int(round(price * self._price_lots_denominator / self._price_lots_numerator))
 
     def base_size_lots_to_number(self, size: int) -> float:
-        return float(size * self.base_lot_size()) / self.base_spl_token_multiplier()
+        return float(size * self._base_lot_size) / self._base_multiplier
 
     def base_size_number_to_lots(self, size: float) -> int:
-        return int(math.floor(size * self.base_spl_token_multiplier()) / self.base_lot_size())
+        return int(math.floor(size * self._base_multiplier) / self._base_lot_size)
 
     def quote_size_lots_to_number(self, size: int) -> float:
-        return float(size * self.quote_lot_size()) / self.quote_spl_token_multiplier()
+        return float(size * self._quote_lot_size) / self._quote_multiplier
 
     def quote_size_number_to_lots(self, size: float) -> int:
-        return int(math.floor(size * self.quote_spl_token_multiplier()) / self.quote_lot_size())
+        return int(math.floor(size * self._quote_multiplier) / self._quote_lot_size)
+
+    # The array variants below apply the conversions above to NumPy arrays and require the optional NumPy dependency.
+    # Lots are returned as int64 arrays and numbers as float64 arrays.
+
+    def price_lots_to_number_array(self, prices: NDArray) -> NDArray:
+        np = require_numpy()
+        return np.asarray(prices).astype(np.float64) * self._price_lots_numerator / self._price_lots_denominator
+
+    def price_number_to_lots_array(self, prices: NDArray) -> NDArray:
+        np = require_numpy()
+        lots = np.asarray(prices, dtype=np.float64) * self._price_lots_denominator / self._price_lots_numerator
+        return np.rint(lots).astype(np.int64)
+
+    def base_size_lots_to_number_array(self, sizes: NDArray) -> NDArray:
+        np = require_numpy()
+        return np.asarray(sizes).astype(np.float64) * self._base_lot_size / self._base_multiplier
+
+    def base_size_number_to_lots_array(self, sizes: NDArray) -> NDArray:
+        np = require_numpy()
+        return (np.floor(np.asarray(sizes, dtype=np.float64) * self._base_multiplier) / self._base_lot_size).astype(
+            np.int64
+        )
+
+    def quote_size_lots_to_number_array(self, sizes: NDArray) -> NDArray:
+        np = require_numpy()
+        return np.asarray(sizes).astype(np.float64) * self._quote_lot_size / self._quote_multiplier
+
+    def quote_size_number_to_lots_array(self, sizes: NDArray) -> NDArray:
+        np = require_numpy()
+        return (np.floor(np.asarray(sizes, dtype=np.float64) * self._quote_multiplier) / self._quote_lot_size).astype(
+            np.int64
+        )
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+
+import pyserum.market.types as t
+
+from ..enums import Side
+from ._internal.queue import SEQ_NUM_MODULUS
+from .core import MarketCore
+
+
+class _Candles:  # pylint: disable=too-few-public-methods
+    """Rolling candles of one interval, the open one is updated in place and closed ones are kept up to a limit."""
+
+    def __init__(self, interval: float, max_candles: int) -> None:
+        self.interval = interval
+        self.closed: Deque[t.Candle] = deque(maxlen=max_candles)
+        self.current: Optional[t.Candle] = None
+
+    def add(self, trade: t.Trade, timestamp: float) -> None:
+        start = timestamp - timestamp % self.interval
+        current = self.current
+        if current is not None and start <= current.start:
+            # Trades timestamped before the open candle are folded into it rather than reopening a closed one.
+            self.current = current._replace(
+                high=max(current.high, trade.price),
+                low=min(current.low, trade.price),
+                close=trade.price,
+                volume=current.volume + trade.size,
+                quote_volume=current.quote_volume + trade.price * trade.size,
+                trades=current.trades + 1,
+            )
+            return
+        if current is not None:
+            self.closed.append(current)
+        self.current = t.Candle(
+            start=start,
+            open=trade.price,
+            high=trade.price,
+            low=trade.price,
+            close=trade.price,
+            volume=trade.size,
+            quote_volume=trade.price * trade.size,
+            trades=1,
+        )
+
+
+class TradeTape:
+    """Pairs the maker and taker fill events of a market into trades and keeps rolling candles of them.
+
+    The matching engine writes one fill event per maker order matched, then a single fill event for the taker covering
+    all of them. Maker fills are held until the taker fill that follows them, so the tape must see every event: feed
+    it the updates of an `EventQueueCursor`. Events already seen are skipped, so overlapping updates are harmless.
+
+    Memory is bounded, only the last `max_trades` trades and `max_candles` closed candles per interval are kept.
+    Intervals without trades have no candle.
+    """
+
+    def __init__(
+        self,
+        market: MarketCore,
+        intervals: Sequence[float] = (60,),
+        max_trades: int = 1000,
+        max_candles: int = 1000,
+        max_pending: int = 256,
+    ) -> None:
+        self._market = market
+        self._candles: Dict[float, _Candles] = {interval: _Candles(interval, max_candles) for interval in intervals}
+        self._pending: Deque[Tuple[int, t.Event]] = deque(maxlen=max_pending)
+        self._seq_num: Optional[int] = None
+        self.trades: Deque[t.Trade] = deque(maxlen=max_trades)
+        """Most recent trades, oldest first."""
+
+    def update(self, update: t.EventQueueUpdate, timestamp: Optional[float] = None) -> List[t.Trade]:
+        """Add the events of a cursor update, returns the new trades.
+
+        The events do not carry a time, trades are put into candles at `timestamp`, the current time by default.
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        if update.lost:
+            # Some fills were overwritten, the pending makers may no longer belong to the next taker.
+            self._pending.clear()
+        trades: List[t.Trade] = []
+        for i, event in enumerate(update.events):
+            seq_num = (update.seq_num + i) % SEQ_NUM_MODULUS
+            if self._seq_num is not None:
+                ahead = (seq_num - self._seq_num) % SEQ_NUM_MODULUS
+                if ahead >= SEQ_NUM_MODULUS // 2:
+                    continue
+                if ahead:
+                    self._pending.clear()
+            self._seq_num = (seq_num + 1) % SEQ_NUM_MODULUS
+            if not event.event_flags.fill or event.native_quantity_paid <= 0:
+                continue
+            if event.event_flags.maker:
+                self._pending.append((seq_num, event))
+            else:
+                trades.extend(self.__match(event))
+        for trade in trades:
+            self.trades.append(trade)
+            for candles in self._candles.values():
+                candles.add(trade, timestamp)
+        return trades
+
+    def candles(self, interval: float) -> List[t.Candle]:
+        """Candles of an interval, oldest first, the last one is still open."""
+        candles = self._candles[interval]
+        return list(candles.closed) + ([candles.current] if candles.current is not None else [])
+
+    def __match(self, taker_event: t.Event) -> List[t.Trade]:
+        makers = [
+            (seq_num, event) for seq_num, event in self._pending if event.event_flags.bid != taker_event.event_flags.bid
+        ]
+        self._pending.clear()
+        if not makers:
+            return []
+        taker = self._market.parse_fill_event(taker_event)
+        total_paid = sum(event.native_quantity_paid for _, event in makers)
+        trades = []
+        allocated_fee = 0
+        for i, (seq_num, event) in enumerate(makers):
+            maker = self._market.parse_fill_event(event)
+            if i == len(makers) - 1:
+                taker_fee_cost = taker.fee_cost - allocated_fee
+            else:
+                taker_fee_cost = taker.fee_cost * event.native_quantity_paid // total_paid
+            allocated_fee += taker_fee_cost
+            trades.append(
+                t.Trade(
+                    seq_num=seq_num,
+                    side=Side.SELL if event.event_flags.bid else Side.BUY,
+                    price=maker.price,
+                    size=maker.size,
+                    maker=event.public_key,
+                    taker=taker_event.public_key,
+                    maker_order_id=maker.order_id,
+                    taker_order_id=taker.order_id,
+                    maker_fee_cost=maker.fee_cost,
+                    taker_fee_cost=taker_fee_cost,
+                )
+            )
+        return trades
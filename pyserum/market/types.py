@@ -1,10 +1,11 @@
 from __future__ import annotations
 
-from typing import NamedTuple
+from typing import List, NamedTuple
 
 from solana.publickey import PublicKey
 
 from .._layouts.account_flags import ACCOUNT_FLAGS_LAYOUT
+from .._numpy import NDArray
 from ..enums import Side
 
 
@@ -79,6 +80,64 @@ class Order(NamedTuple):
     """"""
 
 
+class OrderArrays(NamedTuple):
+    """Column arrays of the orders in a book, in the same order as `OrderBook.orders()`."""
+
+    price_lots: NDArray
+    """int64 price of each order in lots."""
+    sequence: NDArray
+    """uint64 sequence number of each order."""
+    quantity: NDArray
+    """int64 size of each order in lots."""
+    owner_slot: NDArray
+    """uint8 slot of each order in its open orders account."""
+    fee_tier: NDArray
+    """uint8 fee tier of each order."""
+    client_order_id: NDArray
+    """uint64 client order id of each order."""
+    owner: NDArray
+    """32-byte void open orders address of each order, `bytes(owner[i])` gives the raw public key."""
+
+
+class L2Arrays(NamedTuple):
+    """Level 2 market information as contiguous arrays, best price first."""
+
+    price: NDArray
+    """float64 price of each level."""
+    size: NDArray
+    """float64 total size of each level."""
+    price_lots: NDArray
+    """int64 price of each level in lots."""
+    size_lots: NDArray
+    """int64 total size of each level in lots."""
+
+
+class FillArrays(NamedTuple):
+    """Fills of an event queue as column arrays."""
+
+    side: NDArray
+    """uint8 `Side` value of each fill."""
+    maker: NDArray
+    """bool, whether each fill is the maker side of its trade."""
+    price: NDArray
+    """float64 price of each fill, before fees."""
+    size: NDArray
+    """float64 size of each fill."""
+    fee_cost: NDArray
+    """int64 fee cost of each fill in native quote units, as in `FilledOrder.fee_cost`.
+
+    The fee or rebate of a maker fill is kept as is, the fee of a taker fill is negated, so taker fees are negative.
+    """
+    order_id_high: NDArray
+    """uint64 upper half of each order id, the price in lots."""
+    order_id_low: NDArray
+    """uint64 lower half of each order id, the sequence number."""
+    client_order_id: NDArray
+    """uint64 client order id of each fill."""
+    owner: NDArray
+    """32-byte void open orders address of each fill, `bytes(owner[i])` gives the raw public key."""
+
+
 class ReuqestFlags(NamedTuple):
     new_order: bool
     cancel_order: bool
@@ -148,3 +207,60 @@ class TokenInfo(NamedTuple):
     """"""
     address: PublicKey
     """"""
+
+
+class EventQueueUpdate(NamedTuple):
+    """Events added to an event queue since the previous update of an `EventQueueCursor`."""
+
+    events: List[Event]
+    """New events, oldest first."""
+    seq_num: int
+    """Sequence number of the first event in `events`."""
+    lost: int
+    """Number of events overwritten before they could be read."""
+
+
+class Trade(NamedTuple):
+    """A match between a maker order and a taker order, paired from their fill events."""
+
+    seq_num: int
+    """Sequence number of the maker fill event, unique per trade."""
+    side: Side
+    """Side of the taker."""
+    price: float
+    """"""
+    size: float
+    """"""
+    maker: PublicKey
+    """Open orders address of the maker."""
+    taker: PublicKey
+    """Open orders address of the taker."""
+    maker_order_id: int
+    """"""
+    taker_order_id: int
+    """"""
+    maker_fee_cost: int
+    """Fee cost of the maker fill, as in `FilledOrder.fee_cost`."""
+    taker_fee_cost: int
+    """Share of the taker fill fee cost, split between makers pro rata to size."""
+
+
+class Candle(NamedTuple):
+    """Open, high, low, close and volume of the trades within an interval."""
+
+    start: float
+    """Timestamp of the start of the interval."""
+    open: float
+    """"""
+    high: float
+    """"""
+    low: float
+    """"""
+    close: float
+    """"""
+    volume: float
+    """Traded base size."""
+    quote_volume: float
+    """Traded quote size, sum of price times size."""
+    trades: int
+    """Number of trades."""
@@ -1,18 +1,31 @@
 from __future__ import annotations
 
 import base64
-from typing import List, NamedTuple, Tuple, Type, TypeVar
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple, Type, TypeVar, Union, overload
 
 from solana.publickey import PublicKey
 from solana.rpc.api import Client
 from solana.rpc.commitment import Recent
-from solana.rpc.types import Commitment, MemcmpOpts, RPCResponse
+from solana.rpc.types import Commitment, DataSliceOpts, MemcmpOpts, RPCResponse
 from solana.system_program import CreateAccountParams, create_account
 from solana.transaction import TransactionInstruction
 
-from ._layouts.open_orders import OPEN_ORDERS_LAYOUT
+from ._layouts.open_orders import (
+    ACCOUNT_FLAG_INITIALIZED,
+    ACCOUNT_FLAG_OPEN_ORDERS,
+    OPEN_ORDERS_BALANCES_OFFSET,
+    OPEN_ORDERS_BALANCES_STRUCT,
+    OPEN_ORDERS_CLIENT_ID_STRUCT,
+    OPEN_ORDERS_CLIENT_IDS_OFFSET,
+    OPEN_ORDERS_HEADER_STRUCT,
+    OPEN_ORDERS_LAYOUT,
+    OPEN_ORDERS_ORDER_STRUCT,
+    OPEN_ORDERS_ORDERS_OFFSET,
+    OPEN_ORDERS_SLOT_COUNT,
+)
+from .enums import Side
 from .instructions import DEFAULT_DEX_PROGRAM_ID
-from .utils import load_bytes_data
+from .utils import intern_public_key, load_bytes_data, load_multiple_bytes_data
 
 
 class ProgramAccount(NamedTuple):
@@ -23,6 +36,74 @@ class ProgramAccount(NamedTuple):
     owner: PublicKey
 
 
+class OpenOrdersBalances(NamedTuple):
+    address: PublicKey
+    base_token_free: int
+    base_token_total: int
+    quote_token_free: int
+    quote_token_total: int
+
+
+# Data slices asking the RPC node for the balances only, or for no data at all when only the addresses are needed.
+BALANCES_DATA_SLICE = DataSliceOpts(offset=OPEN_ORDERS_BALANCES_OFFSET, length=OPEN_ORDERS_BALANCES_STRUCT.size)
+ADDRESSES_DATA_SLICE = DataSliceOpts(offset=0, length=0)
+
+
+class ActiveOrder(NamedTuple):
+    slot: int
+    side: Side
+    order_id: int
+    client_id: int
+
+
+def _decode_order(buffer: memoryview, offset: int) -> int:
+    low, high = OPEN_ORDERS_ORDER_STRUCT.unpack_from(buffer, offset)
+    return (high << 64) | low
+
+
+def _decode_client_id(buffer: memoryview, offset: int) -> int:
+    return OPEN_ORDERS_CLIENT_ID_STRUCT.unpack_from(buffer, offset)[0]
+
+
+class _LazySlots(Sequence[int]):
+    """Order slots backed by the raw account, each slot is decoded on first access and memoized."""
+
+    def __init__(self, buffer: memoryview, offset: int, item_size: int, decode: Callable[[memoryview, int], int]):
+        self._buffer = buffer
+        self._offset = offset
+        self._item_size = item_size
+        self._decode = decode
+        self._cache: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return OPEN_ORDERS_SLOT_COUNT
+
+    @overload
+    def __getitem__(self, index: int) -> int:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[int]:
+        ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[int, List[int]]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(OPEN_ORDERS_SLOT_COUNT))]
+        if index < 0:
+            index += OPEN_ORDERS_SLOT_COUNT
+        value = self._cache.get(index)
+        if value is None:
+            if not 0 <= index < OPEN_ORDERS_SLOT_COUNT:
+                raise IndexError("Open orders slot index out of range")
+            value = self._decode(self._buffer, self._offset + index * self._item_size)
+            self._cache[index] = value
+        return value
+
+    @property
+    def decoded_count(self) -> int:
+        return len(self._cache)
+
+
 _T = TypeVar("_T", bound="_OpenOrdersAccountCore")
 
 
@@ -39,8 +120,8 @@ class _OpenOrdersAccountCore:  # pylint: disable=too-many-instance-attributes,to
         quote_token_total: int,
         free_slot_bits: int,
         is_bid_bits: int,
-        orders: List[int],
-        client_ids: List[int],
+        orders: Sequence[int],
+        client_ids: Sequence[int],
     ):
         self.address = address
         self.market = market
@@ -55,15 +136,22 @@ class _OpenOrdersAccountCore:  # pylint: disable=too-many-instance-attributes,to
         self.client_ids = client_ids
 
     @classmethod
-    def from_bytes(cls: Type[_T], address: PublicKey, buffer: bytes) -> _T:
+    def from_bytes(cls: Type[_T], address: PublicKey, buffer: bytes, lazy: bool = False) -> _T:
+        """Decode an open orders account.
+
+        With `lazy`, only the balances and slot bitmasks are decoded up front, the order ids and client ids of a slot
+        are read from the buffer when the slot is first accessed, so `active_orders` skips the free slots entirely.
+        """
+        if lazy:
+            return cls.__from_bytes_lazy(address, buffer)
         open_order_decoded = OPEN_ORDERS_LAYOUT.parse(buffer)
         if not open_order_decoded.account_flags.open_orders or not open_order_decoded.account_flags.initialized:
             raise Exception("Not an open order account or not initialized.")
 
         return cls(
             address=address,
-            market=PublicKey(open_order_decoded.market),
-            owner=PublicKey(open_order_decoded.owner),
+            market=intern_public_key(open_order_decoded.market),
+            owner=intern_public_key(open_order_decoded.owner),
             base_token_free=open_order_decoded.base_token_free,
             base_token_total=open_order_decoded.base_token_total,
             quote_token_free=open_order_decoded.quote_token_free,
@@ -74,6 +162,71 @@ class _OpenOrdersAccountCore:  # pylint: disable=too-many-instance-attributes,to
             client_ids=open_order_decoded.client_ids,
         )
 
+    @classmethod
+    def _from_bytes_or_none(
+        cls: Type[_T], address: PublicKey, buffer: Optional[bytes], lazy: bool = False
+    ) -> Optional[_T]:
+        """Decode an open orders account, None if it is missing, closed or not an initialized open orders account."""
+        if buffer is None or len(buffer) != OPEN_ORDERS_LAYOUT.sizeof():
+            return None
+        account_flags = OPEN_ORDERS_HEADER_STRUCT.unpack_from(buffer)[0]
+        if not account_flags & ACCOUNT_FLAG_OPEN_ORDERS or not account_flags & ACCOUNT_FLAG_INITIALIZED:
+            return None
+        return cls.from_bytes(address, buffer, lazy)
+
+    @classmethod
+    def __from_bytes_lazy(cls: Type[_T], address: PublicKey, buffer: bytes) -> _T:
+        if len(buffer) < OPEN_ORDERS_LAYOUT.sizeof():
+            raise Exception("Not an open order account or not initialized.")
+        (
+            account_flags,
+            market,
+            owner,
+            base_token_free,
+            base_token_total,
+            quote_token_free,
+            quote_token_total,
+            free_slot_bits,
+            is_bid_bits,
+        ) = OPEN_ORDERS_HEADER_STRUCT.unpack_from(buffer)
+        if not account_flags & ACCOUNT_FLAG_OPEN_ORDERS or not account_flags & ACCOUNT_FLAG_INITIALIZED:
+            raise Exception("Not an open order account or not initialized.")
+
+        view = memoryview(buffer)
+        return cls(
+            address=address,
+            market=intern_public_key(market),
+            owner=intern_public_key(owner),
+            base_token_free=base_token_free,
+            base_token_total=base_token_total,
+            quote_token_free=quote_token_free,
+            quote_token_total=quote_token_total,
+            free_slot_bits=int.from_bytes(free_slot_bits, "little"),
+            is_bid_bits=int.from_bytes(is_bid_bits, "little"),
+            orders=_LazySlots(view, OPEN_ORDERS_ORDERS_OFFSET, OPEN_ORDERS_ORDER_STRUCT.size, _decode_order),
+            client_ids=_LazySlots(
+                view, OPEN_ORDERS_CLIENT_IDS_OFFSET, OPEN_ORDERS_CLIENT_ID_STRUCT.size, _decode_client_id
+            ),
+        )
+
+    def active_orders(self) -> List[ActiveOrder]:
+        """Orders in the occupied slots of the account, a slot is free when its bit in `free_slot_bits` is set."""
+        active_orders = []
+        occupied = ~self.free_slot_bits & ((1 << len(self.orders)) - 1)
+        while occupied:
+            lowest = occupied & -occupied
+            slot = lowest.bit_length() - 1
+            occupied ^= lowest
+            active_orders.append(
+                ActiveOrder(
+                    slot=slot,
+                    side=Side.BUY if (self.is_bid_bits >> slot) & 1 else Side.SELL,
+                    order_id=self.orders[slot],
+                    client_id=self.client_ids[slot],
+                )
+            )
+        return active_orders
+
     @classmethod
     def _process_get_program_accounts_resp(cls: Type[_T], resp: RPCResponse) -> List[_T]:
         accounts = []
@@ -92,9 +245,52 @@ class _OpenOrdersAccountCore:  # pylint: disable=too-many-instance-attributes,to
         return [cls.from_bytes(account.public_key, account.data) for account in accounts]
 
     @staticmethod
-    def _build_get_program_accounts_args(
-        market: PublicKey, program_id: PublicKey, owner: PublicKey, commitment: Commitment
+    def _process_get_program_accounts_balances_resp(resp: RPCResponse) -> List[OpenOrdersBalances]:
+        balances = []
+        for account in resp["result"]:
+            data = base64.decodebytes(account["account"]["data"][0].encode("ascii"))
+            balances.append(OpenOrdersBalances(PublicKey(account["pubkey"]), *OPEN_ORDERS_BALANCES_STRUCT.unpack(data)))
+        return balances
+
+    @staticmethod
+    def _process_get_program_accounts_addresses_resp(resp: RPCResponse) -> List[PublicKey]:
+        return [PublicKey(account["pubkey"]) for account in resp["result"]]
+
+    @staticmethod
+    def _group_by_market(accounts: List[_T]) -> Dict[str, List[_T]]:
+        # Public keys are not hashable, markets are keyed by their base 58 address.
+        accounts_by_market: Dict[str, List[_T]] = {}
+        for account in accounts:
+            accounts_by_market.setdefault(str(account.market), []).append(account)
+        return accounts_by_market
+
+    @staticmethod
+    def _build_get_program_accounts_args_for_owner(
+        program_id: PublicKey, owner: PublicKey, commitment: Commitment
     ) -> Tuple[PublicKey, Commitment, str, None, int, List[MemcmpOpts]]:
+        filters = [
+            MemcmpOpts(
+                offset=5 + 8 + 32,  # 5 bytes of padding, 8 bytes of account flag, 32 bytes of market public key
+                bytes=str(owner),
+            ),
+        ]
+        return (
+            program_id,
+            commitment,
+            "base64",
+            None,
+            OPEN_ORDERS_LAYOUT.sizeof(),
+            filters,
+        )
+
+    @staticmethod
+    def _build_get_program_accounts_args(
+        market: PublicKey,
+        program_id: PublicKey,
+        owner: PublicKey,
+        commitment: Commitment,
+        data_slice: Optional[DataSliceOpts] = None,
+    ) -> Tuple[PublicKey, Commitment, str, Optional[DataSliceOpts], int, List[MemcmpOpts]]:
         filters = [
             MemcmpOpts(
                 offset=5 + 8,  # 5 bytes of padding, 8 bytes of account flag
@@ -105,7 +301,6 @@ class _OpenOrdersAccountCore:  # pylint: disable=too-many-instance-attributes,to
                 bytes=str(owner),
             ),
         ]
-        data_slice = None
         return (
             program_id,
             commitment,
@@ -127,12 +322,54 @@ class OpenOrdersAccount(_OpenOrdersAccountCore):
         resp = conn.get_program_accounts(*args)
         return cls._process_get_program_accounts_resp(resp)
 
+    @classmethod
+    def find_all_for_owner(
+        cls, conn: Client, owner: PublicKey, program_id: PublicKey, commitment: Commitment = Recent
+    ) -> Dict[str, List[OpenOrdersAccount]]:
+        """Find the open orders accounts of an owner on every market in one request, keyed by market address."""
+        args = cls._build_get_program_accounts_args_for_owner(program_id=program_id, owner=owner, commitment=commitment)
+        resp = conn.get_program_accounts(*args)
+        return cls._group_by_market(cls._process_get_program_accounts_resp(resp))
+
+    @classmethod
+    def find_balances_for_market_and_owner(  # pylint: disable=too-many-arguments
+        cls, conn: Client, market: PublicKey, owner: PublicKey, program_id: PublicKey, commitment: Commitment = Recent
+    ) -> List[OpenOrdersBalances]:
+        """Find the balances of the open orders accounts of an owner, fetching 32 bytes per account instead of 3228."""
+        args = cls._build_get_program_accounts_args(
+            market=market, program_id=program_id, owner=owner, commitment=commitment, data_slice=BALANCES_DATA_SLICE
+        )
+        resp = conn.get_program_accounts(*args)
+        return cls._process_get_program_accounts_balances_resp(resp)
+
+    @classmethod
+    def find_addresses_for_market_and_owner(  # pylint: disable=too-many-arguments
+        cls, conn: Client, market: PublicKey, owner: PublicKey, program_id: PublicKey, commitment: Commitment = Recent
+    ) -> List[PublicKey]:
+        """Find the addresses of the open orders accounts of an owner, without fetching any account data."""
+        args = cls._build_get_program_accounts_args(
+            market=market, program_id=program_id, owner=owner, commitment=commitment, data_slice=ADDRESSES_DATA_SLICE
+        )
+        resp = conn.get_program_accounts(*args)
+        return cls._process_get_program_accounts_addresses_resp(resp)
+
     @classmethod
     def load(cls, conn: Client, address: str) -> OpenOrdersAccount:
         addr_pub_key = PublicKey(address)
         bytes_data = load_bytes_data(addr_pub_key, conn)
         return cls.from_bytes(addr_pub_key, bytes_data)
 
+    @classmethod
+    def load_many(
+        cls, conn: Client, addresses: Sequence[PublicKey], lazy: bool = False
+    ) -> List[Optional[OpenOrdersAccount]]:
+        """Load many open orders accounts with one request per 100 accounts.
+
+        Accounts are returned in the order of `addresses`, with None for missing or closed accounts.
+        """
+        data = load_multiple_bytes_data(addresses, conn)
+        return [cls._from_bytes_or_none(address, bytes_data, lazy) for address, bytes_data in zip(addresses, data)]
+
 
 def make_create_account_instruction(
     owner_address: PublicKey,
@@ -1,4 +1,7 @@
 import base64
+import threading
+from collections import OrderedDict
+from typing import List, NamedTuple, Optional, Sequence
 
 from solana.publickey import PublicKey
 from solana.rpc.api import Client
@@ -20,6 +23,32 @@ def load_bytes_data(addr: PublicKey, conn: Client) -> bytes:
     return parse_bytes_data(res)
 
 
+def parse_multiple_bytes_data(res: RPCResponse) -> List[Optional[bytes]]:
+    """Parse a getMultipleAccounts response, missing accounts are None."""
+    if ("result" not in res) or ("value" not in res["result"]):
+        raise Exception("Cannot load byte data.")
+    return [
+        None if account is None else base64.decodebytes(account["data"][0].encode("ascii"))
+        for account in res["result"]["value"]
+    ]
+
+
+# RPC nodes reject getMultipleAccounts requests for more than 100 accounts.
+MULTIPLE_ACCOUNTS_CHUNK_SIZE = 100
+
+
+def load_multiple_bytes_data(
+    addrs: Sequence[PublicKey], conn: Client, chunk_size: int = MULTIPLE_ACCOUNTS_CHUNK_SIZE
+) -> List[Optional[bytes]]:
+    """Load the data of many accounts with one getMultipleAccounts request per chunk, missing accounts are None."""
+    data: List[Optional[bytes]] = []
+    for start in range(0, len(addrs), chunk_size):
+        end = start + chunk_size
+        res = conn.get_multiple_accounts(list(addrs[start:end]))
+        data.extend(parse_multiple_bytes_data(res))
+    return data
+
+
 def parse_mint_decimals(bytes_data: bytes) -> int:
     return MINT_LAYOUT.parse(bytes_data).decimals
 
@@ -31,3 +60,56 @@ def get_mint_decimals(conn: Client, mint_pub_key: PublicKey) -> int:
 
     bytes_data = load_bytes_data(mint_pub_key, conn)
     return parse_mint_decimals(bytes_data)
+
+
+class PublicKeyCacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class PublicKeyCache:
+    """Bounded LRU table mapping raw 32-byte keys to shared `PublicKey` instances.
+
+    The same open orders accounts show up over and over in books and queues, interning them saves building a new
+    `PublicKey` for every occurrence.
+    """
+
+    def __init__(self, maxsize: int = 4096) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._keys: "OrderedDict[bytes, PublicKey]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, raw: bytes) -> PublicKey:
+        with self._lock:
+            key = self._keys.get(raw)
+            if key is not None:
+                self._keys.move_to_end(raw)
+                self.hits += 1
+                return key
+            self.misses += 1
+            key = PublicKey(raw)
+            self._keys[raw] = key
+            if len(self._keys) > self.maxsize:
+                self._keys.popitem(last=False)
+            return key
+
+    def cache_info(self) -> PublicKeyCacheInfo:
+        return PublicKeyCacheInfo(hits=self.hits, misses=self.misses, maxsize=self.maxsize, currsize=len(self._keys))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._keys.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+PUBLIC_KEY_CACHE = PublicKeyCache()
+
+
+def intern_public_key(raw: bytes) -> PublicKey:
+    """Get the shared `PublicKey` for raw key bytes from `PUBLIC_KEY_CACHE`."""
+    return PUBLIC_KEY_CACHE.get(raw)
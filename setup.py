@@ -12,6 +12,7 @@ setup(
         "construct-typing>=0.5.1, <1.0.0",
         "solana>=0.11.3, <1.0.0",
     ],
+    extras_require={"numpy": ["numpy>=1.19"]},
     python_requires=">=3.7, <4",
     license="MIT",
     package_data={"pyserum": ["py.typed"]},
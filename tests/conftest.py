@@ -9,6 +9,19 @@ from solana.rpc.async_api import AsyncClient
 
 from pyserum.async_connection import async_conn
 from pyserum.connection import conn
+from pyserum.instructions import DEFAULT_DEX_PROGRAM_ID
+from pyserum.market import Market, State
+
+from .stubbed_client import build_market_data
+
+
+@pytest.fixture(scope="module")
+def stubbed_market() -> Market:
+    """Market with a stubbed connection, for tests that do not send requests."""
+    market_state = State.from_bytes(
+        DEFAULT_DEX_PROGRAM_ID, 6, 6, build_market_data(quote_dust_threshold=100, base_lot_size=100, quote_lot_size=10)
+    )
+    return Market(Client("http://stubbed_endpoint:123/"), market_state)
 
 
 @pytest.mark.integration
@@ -0,0 +1,141 @@
+import asyncio
+import base64
+
+import base58
+from solana.publickey import PublicKey
+
+from pyserum._layouts.market import MARKET_LAYOUT
+from pyserum._layouts.open_orders import OPEN_ORDERS_LAYOUT
+
+
+class StubbedAccountsClient:
+    """Answers account requests from a dict of account data and records the requested keys and filters."""
+
+    def __init__(self, accounts):
+        self.accounts = accounts
+        self.requests = []
+        self.send_error = None
+
+    def get_account_info(self, pubkey):
+        self.requests.append(pubkey)
+        return {"result": {"context": {"slot": 1}, "value": self.__account(pubkey)}}
+
+    def get_multiple_accounts(self, pubkeys):
+        self.requests.append(pubkeys)
+        return {"result": {"context": {"slot": 1}, "value": [self.__account(key) for key in pubkeys]}}
+
+    def get_program_accounts(  # pylint: disable=too-many-arguments
+        self, pubkey, commitment=None, encoding=None, data_slice=None, data_size=None, memcmp_opts=None
+    ):
+        self.requests.append((pubkey, commitment, encoding, data_slice, data_size, memcmp_opts))
+        result = []
+        for key, data in self.accounts.items():
+            if data_size is not None and len(data) != data_size:
+                continue
+            if not all(self.__matches(data, opts) for opts in memcmp_opts or []):
+                continue
+            if data_slice is not None:
+                offset, length = data_slice
+                data = data[offset:][:length]
+            account = {"data": [base64.b64encode(data).decode(), "base64"], "executable": False, "lamports": 1}
+            result.append({"pubkey": str(PublicKey(key)), "account": dict(account, owner=str(pubkey))})
+        return {"result": result}
+
+    def get_minimum_balance_for_rent_exemption(self, usize):
+        self.requests.append(usize)
+        return {"result": 23357760}
+
+    def send_transaction(self, transaction, *signers, opts=None):  # pylint: disable=unused-argument
+        self.requests.append(transaction)
+        if self.send_error is not None:
+            raise self.send_error
+        return {"result": "signature"}
+
+    @staticmethod
+    def __matches(data, opts):
+        expected = base58.b58decode(opts.bytes)
+        return data.startswith(expected, opts.offset)
+
+    def __account(self, pubkey):
+        if bytes(pubkey) not in self.accounts:
+            return None
+        return {"data": [base64.b64encode(self.accounts[bytes(pubkey)]).decode(), "base64"]}
+
+
+class AsyncStubbedAccountsClient(StubbedAccountsClient):
+    """Asynchronous twin of `StubbedAccountsClient`, answering getMultipleAccounts."""
+
+    async def get_multiple_accounts(self, pubkeys):  # pylint: disable=invalid-overridden-method
+        await asyncio.sleep(0)
+        return super().get_multiple_accounts(pubkeys)
+
+
+def build_open_orders_data(  # pylint: disable=too-many-arguments
+    market=bytes([2] * 32),
+    owner=bytes([3] * 32),
+    balances=(1, 2, 3, 4),
+    active=None,
+    is_bid_bits=0,
+) -> bytes:
+    """Build an open orders account holding the orders of `active`, a dict of slot to (order id, client id)."""
+    active = active or {}
+    orders = [bytes(16)] * 128
+    client_ids = [0] * 128
+    for slot, (order_id, client_id) in active.items():
+        orders[slot] = order_id.to_bytes(16, "little")
+        client_ids[slot] = client_id
+    free_slot_bits = (2**128 - 1) ^ sum(1 << slot for slot in active)
+    return OPEN_ORDERS_LAYOUT.build(
+        dict(
+            account_flags=dict(
+                initialized=True,
+                market=False,
+                open_orders=True,
+                request_queue=False,
+                event_queue=False,
+                bids=False,
+                asks=False,
+            ),
+            market=market,
+            owner=owner,
+            base_token_free=balances[0],
+            base_token_total=balances[1],
+            quote_token_free=balances[2],
+            quote_token_total=balances[3],
+            free_slot_bits=free_slot_bits.to_bytes(16, "little"),
+            is_bid_bits=is_bid_bits.to_bytes(16, "little"),
+            orders=orders,
+            client_ids=client_ids,
+            referrer_rebate_accrued=0,
+        )
+    )
+
+
+def build_market_data(**fields) -> bytes:
+    flags = dict(
+        initialized=True, market=True, open_orders=False, request_queue=False, event_queue=False, bids=False, asks=False
+    )
+    values = dict(
+        account_flags=flags,
+        own_address=bytes(32),
+        vault_signer_nonce=1,
+        base_mint=bytes(32),
+        quote_mint=bytes(32),
+        base_vault=bytes(32),
+        base_deposits_total=2,
+        base_fees_accrued=3,
+        quote_vault=bytes(32),
+        quote_deposits_total=4,
+        quote_fees_accrued=5,
+        quote_dust_threshold=6,
+        request_queue=bytes(32),
+        event_queue=bytes(32),
+        bids=bytes(32),
+        asks=bytes(32),
+        base_lot_size=100,
+        quote_lot_size=10,
+        fee_rate_bps=22,
+        referrer_rebate_accrued=7,
+    )
+    values.update(fields)
+    return MARKET_LAYOUT.build(values)
@@ -2,13 +2,22 @@ import base64
 
 import pytest
 from construct import Container
-from solana.rpc.api import Client
+from solana.keypair import Keypair
+from solana.publickey import PublicKey
+from solana.system_program import decode_create_account
+from spl.token.constants import WRAPPED_SOL_MINT
 
+from pyserum._layouts.market import MINT_LAYOUT
+from pyserum.enums import OrderType, Side
 from pyserum.instructions import DEFAULT_DEX_PROGRAM_ID
 from pyserum.market import Market, OrderBook, State
+from pyserum.market._internal.queue import decode_event_queue
+from pyserum.market.core import LAMPORTS_PER_SOL
 from pyserum.market.types import AccountFlags, Order, OrderInfo
+from pyserum.open_orders_account import OpenOrdersAccount
 
-from .binary_file_path import ASK_ORDER_BIN_PATH
+from .binary_file_path import ASK_ORDER_BIN_PATH, EVENT_QUEUE_BIN_PATH
+from .stubbed_client import StubbedAccountsClient, build_market_data, build_open_orders_data
 
 
 @pytest.fixture(scope="module")
@@ -26,29 +35,6 @@ def stubbed_data() -> bytes:
     return bytes.fromhex(MARKET_DATA_HEX)
 
 
-@pytest.fixture(scope="module")
-def stubbed_market() -> Market:
-    conn = Client("http://stubbed_endpoint:123/")
-    market_state = State(
-        Container(
-            dict(
-                account_flags=AccountFlags(
-                    initialized=True,
-                    market=True,
-                    bids=False,
-                ),
-                quote_dust_threshold=100,
-                base_lot_size=100,
-                quote_lot_size=10,
-            )
-        ),
-        program_id=DEFAULT_DEX_PROGRAM_ID,
-        base_mint_decimals=6,
-        quote_mint_decimals=6,
-    )
-    return Market(conn, market_state)
-
-
 # TODO: This tests is not ran due to the v1 layout to v2 layout upgrade, we
 # should update the binary and make it work again
 @pytest.mark.skip(reason="We need to upgrade to v2 layout.")
@@ -83,6 +69,16 @@ def test_order_book_get_l2(stubbed_market):  # pylint: disable=redefined-outer-n
         assert [OrderInfo(11744.6, 4.0632, 117446, 40632)] == order_book.get_l2(1)
 
 
+def test_lazy_order_book_get_l2(stubbed_market):  # pylint: disable=redefined-outer-name
+    with open(ASK_ORDER_BIN_PATH, "r") as input_file:
+        base64_res = input_file.read()
+        data = base64.decodebytes(base64_res.encode("ascii"))
+        order_book = OrderBook.from_bytes(stubbed_market.state, data)
+        lazy_order_book = OrderBook.from_bytes(stubbed_market.state, data, lazy=True)
+        assert lazy_order_book.get_l2(5) == order_book.get_l2(5)
+        assert list(lazy_order_book.orders()) == list(order_book.orders())
+
+
 def test_order_book_iterable(stubbed_market):  # pylint: disable=redefined-outer-name
     with open(ASK_ORDER_BIN_PATH, "r") as input_file:
         base64_res = input_file.read()
@@ -93,3 +89,315 @@ def test_order_book_iterable(stubbed_market):  # pylint: disable=redefined-outer
             cnt += 1
             assert isinstance(order, Order)
         assert cnt == 15
+
+
+def test_order_book_best(stubbed_market):  # pylint: disable=redefined-outer-name
+    with open(ASK_ORDER_BIN_PATH, "r") as input_file:
+        base64_res = input_file.read()
+        data = base64.decodebytes(base64_res.encode("ascii"))
+        order_book = OrderBook.from_bytes(stubbed_market.state, data, lazy=True)
+        best = order_book.best()
+        assert best == next(iter(order_book.orders()))
+        assert best.info == order_book.get_l2(1)[0]
+        assert order_book.best_n_levels(3) == order_book.get_l2(3)
+
+
+def test_order_book_size_and_price_queries(stubbed_market):  # pylint: disable=redefined-outer-name
+    with open(ASK_ORDER_BIN_PATH, "r") as input_file:
+        base64_res = input_file.read()
+        data = base64.decodebytes(base64_res.encode("ascii"))
+        order_book = OrderBook.from_bytes(stubbed_market.state, data)
+        levels = order_book.get_l2(15)
+        assert order_book.size_within(levels[0].price) == levels[0].size
+        assert order_book.size_within(levels[2].price) == pytest.approx(sum(level.size for level in levels[:3]))
+        assert order_book.size_within(levels[0].price - 1) == 0
+        # Limits between two ticks only count the orders priced within them.
+        assert order_book.size_within(11744.86) == pytest.approx(4.0632)
+        assert order_book.size_within(11744.64) == pytest.approx(4.0632)
+        # Read as bids, by swapping the asks account flag for the bids one, the same orders are counted from the top.
+        bid_data = bytearray(data)
+        bid_data[5] = 0x21
+        bid_book = OrderBook.from_bytes(stubbed_market.state, bytes(bid_data))
+        top = bid_book.get_l2(2)
+        assert bid_book.size_within(top[0].price + 0.01) == 0
+        assert bid_book.size_within(top[1].price + 0.01) == pytest.approx(top[0].size)
+        assert order_book.price_for_size(levels[0].size) == levels[0].price
+        assert order_book.price_for_size(levels[0].size + 0.0001) == levels[1].price
+        assert order_book.price_for_size(sum(level.size for level in levels) + 1) is None
+        assert order_book.vwap(levels[0].size) == pytest.approx(levels[0].price)
+        assert order_book.vwap(5) == pytest.approx((4.0632 * 11744.6 + 0.9368 * 11744.9) / 5)
+        with pytest.raises(ValueError):
+            order_book.vwap(0)
+
+
+def test_order_book_lookups(stubbed_market):  # pylint: disable=redefined-outer-name
+    with open(ASK_ORDER_BIN_PATH, "r") as input_file:
+        base64_res = input_file.read()
+        data = base64.decodebytes(base64_res.encode("ascii"))
+        order_book = OrderBook.from_bytes(stubbed_market.state, data)
+        orders = list(order_book.orders())
+        owner = orders[3].open_order_address
+        assert order_book.orders_for_owner([owner]) == [o for o in orders if o.open_order_address == owner]
+        assert order_book.orders_for_owner([]) == []
+        assert order_book.orders_for_owner([owner, owner]) == order_book.orders_for_owner([owner])
+        assert order_book.find_by_order_id(orders[5].order_id) == orders[5]
+        assert order_book.find_by_order_id(orders[5].order_id + 1) is None
+        client_id = orders[7].client_id
+        assert order_book.find_by_client_id(client_id) == [o for o in orders if o.client_id == client_id]
+        all_owners = {bytes(o.open_order_address): o.open_order_address for o in orders}.values()
+        assert order_book.orders_for_owner(all_owners) == orders
+
+
+def test_order_book_find_by_order_ids(stubbed_market):  # pylint: disable=redefined-outer-name
+    with open(ASK_ORDER_BIN_PATH, "r") as input_file:
+        base64_res = input_file.read()
+        data = base64.decodebytes(base64_res.encode("ascii"))
+        orders = list(OrderBook.from_bytes(stubbed_market.state, data).orders())
+        order_book = OrderBook.from_bytes(stubbed_market.state, data, lazy=True)
+        order_ids = [orders[9].order_id, orders[2].order_id, orders[2].order_id + 1]
+        assert order_book.find_by_order_ids(order_ids) == [orders[2], orders[9]]
+
+
+def test_load_orders_for_open_orders_accounts():
+    with open(ASK_ORDER_BIN_PATH, "r") as input_file:
+        asks_data = base64.decodebytes(input_file.read().encode("ascii"))
+    market_address = bytes([1] * 32)
+    asks_address = bytes([2] * 32)
+    conn = StubbedAccountsClient({asks_address: asks_data})
+    state = State.from_bytes(
+        DEFAULT_DEX_PROGRAM_ID, 6, 6, build_market_data(own_address=market_address, asks=asks_address)
+    )
+    market = Market(conn, state)
+    placed = next(iter(OrderBook.from_bytes(state, asks_data)))
+    active = {placed.open_order_slot: (placed.order_id, placed.client_id)}
+
+    def load_orders(address, account_market=market_address):
+        account = OpenOrdersAccount.from_bytes(address, build_open_orders_data(market=account_market, active=active))
+        return market.load_orders_for_open_orders_accounts([account])
+
+    assert load_orders(placed.open_order_address) == [placed]
+    # The same id held by an account of another market, or by an account the order was not placed from, is not ours.
+    assert load_orders(placed.open_order_address, account_market=bytes([9] * 32)) == []
+    assert load_orders(PublicKey(bytes([10] * 32))) == []
+
+
+def test_order_book_to_arrays(stubbed_market):  # pylint: disable=redefined-outer-name
+    pytest.importorskip("numpy")
+    with open(ASK_ORDER_BIN_PATH, "r") as input_file:
+        base64_res = input_file.read()
+        data = base64.decodebytes(base64_res.encode("ascii"))
+        order_book = OrderBook.from_bytes(stubbed_market.state, data)
+        arrays = order_book.to_arrays()
+        orders = list(order_book.orders())
+        assert len(arrays.price_lots) == len(orders) == 15
+        assert arrays.price_lots.tolist() == [order.info.price_lots for order in orders]
+        assert arrays.quantity.tolist() == [order.info.size_lots for order in orders]
+        assert arrays.sequence.tolist() == [order.order_id & (2**64 - 1) for order in orders]
+        assert arrays.owner_slot.tolist() == [order.open_order_slot for order in orders]
+        assert arrays.fee_tier.tolist() == [order.fee_tier for order in orders]
+        assert arrays.client_order_id.tolist() == [order.client_id for order in orders]
+        assert [bytes(owner) for owner in arrays.owner] == [bytes(order.open_order_address) for order in orders]
+
+
+def test_order_book_get_l2_arrays(stubbed_market):  # pylint: disable=redefined-outer-name
+    pytest.importorskip("numpy")
+    with open(ASK_ORDER_BIN_PATH, "r") as input_file:
+        base64_res = input_file.read()
+        data = base64.decodebytes(base64_res.encode("ascii"))
+        order_book = OrderBook.from_bytes(stubbed_market.state, data)
+        for depth in (1, 5, 15):
+            levels = order_book.get_l2(depth)
+            arrays = order_book.get_l2_arrays(depth)
+            assert arrays.price.tolist() == [level.price for level in levels]
+            assert arrays.size.tolist() == [level.size for level in levels]
+            assert arrays.price_lots.tolist() == [level.price_lots for level in levels]
+            assert arrays.size_lots.tolist() == [level.size_lots for level in levels]
+        assert len(order_book.get_l2_arrays().price) == 15
+
+
+def test_bid_order_book_get_l2_arrays(stubbed_market):  # pylint: disable=redefined-outer-name
+    pytest.importorskip("numpy")
+    with open(ASK_ORDER_BIN_PATH, "r") as input_file:
+        base64_res = input_file.read()
+        data = bytearray(base64.decodebytes(base64_res.encode("ascii")))
+        # Flip the account flags from asks to bids so that levels are read in descending order.
+        data[5:13] = (0b100001).to_bytes(8, "little")
+        order_book = OrderBook.from_bytes(stubbed_market.state, bytes(data))
+        levels = order_book.get_l2(15)
+        arrays = order_book.get_l2_arrays()
+        assert arrays.price_lots.tolist() == [level.price_lots for level in levels]
+        assert arrays.size_lots.tolist() == [level.size_lots for level in levels]
+
+
+def test_parse_fills_array(stubbed_market):  # pylint: disable=redefined-outer-name
+    pytest.importorskip("numpy")
+    with open(EVENT_QUEUE_BIN_PATH, "r") as input_file:
+        data = bytearray(base64.decodebytes(input_file.read().encode("ascii")))
+    # The recorded queue holds no fills, turn its events into fills of every side and maker combination.
+    for i, offset in enumerate(range(37, len(data) - 87, 88)):
+        data[offset] = 0b0001 | (i % 4) << 2
+    data = bytes(data)
+    for limit in (None, 100):
+        fills = stubbed_market._parse_fills(data, limit)  # pylint: disable=protected-access
+        events = [event for event in decode_event_queue(data, limit) if event.native_quantity_paid > 0]
+        arrays = stubbed_market.parse_fills_array(data, limit)
+        assert len(fills) == len(events) > 0
+        assert arrays.side.tolist() == [fill.side for fill in fills]
+        assert arrays.price.tolist() == pytest.approx([fill.price for fill in fills])
+        assert arrays.size.tolist() == [fill.size for fill in fills]
+        assert arrays.fee_cost.tolist() == [fill.fee_cost for fill in fills]
+        assert [high << 64 | low for high, low in zip(arrays.order_id_high.tolist(), arrays.order_id_low.tolist())] == [
+            fill.order_id for fill in fills
+        ]
+        assert arrays.client_order_id.tolist() == [event.client_order_id for event in events]
+        assert [bytes(owner) for owner in arrays.owner] == [bytes(event.public_key) for event in events]
+
+
+def test_market_state_conversions(stubbed_market):  # pylint: disable=redefined-outer-name
+    state = stubbed_market.state
+    assert state.price_lots_to_number(12345) == 1234.5
+    assert state.price_number_to_lots(1234.5) == 12345
+    assert state.base_size_lots_to_number(25) == 0.0025
+    assert state.base_size_number_to_lots(0.00259) == 25
+    assert state.quote_size_lots_to_number(25) == 0.00025
+    assert state.quote_size_number_to_lots(0.000259) == 25
+
+
+def test_market_state_array_conversions(stubbed_market):  # pylint: disable=redefined-outer-name
+    np = pytest.importorskip("numpy")
+    state = stubbed_market.state
+    lots = np.array([0, 1, 99, 12345, 2**40], dtype=np.uint64)
+    numbers = [0.0, 0.00001, 0.5, 1234.56, 77.77777, 1e6]
+    assert state.price_lots_to_number_array(lots).tolist() == [state.price_lots_to_number(lot) for lot in lots.tolist()]
+    assert state.base_size_lots_to_number_array(lots).tolist() == [
+        state.base_size_lots_to_number(lot) for lot in lots.tolist()
+    ]
+    assert state.quote_size_lots_to_number_array(lots).tolist() == [
+        state.quote_size_lots_to_number(lot) for lot in lots.tolist()
+    ]
+    assert state.price_number_to_lots_array(numbers).tolist() == [state.price_number_to_lots(n) for n in numbers]
+    assert state.base_size_number_to_lots_array(numbers).tolist() == [
+        state.base_size_number_to_lots(n) for n in numbers
+    ]
+    assert state.quote_size_number_to_lots_array(numbers).tolist() == [
+        state.quote_size_number_to_lots(n) for n in numbers
+    ]
+    assert state.price_number_to_lots_array(numbers).dtype == np.int64
+
+
+def test_market_state_from_bytes():
+    keys = {name: bytes([i + 1] * 32) for i, name in enumerate(("own_address", "base_mint", "quote_vault", "bids"))}
+    state = State.from_bytes(DEFAULT_DEX_PROGRAM_ID, 6, 9, build_market_data(**keys))
+    assert state.account_flags() == AccountFlags(initialized=True, market=True)
+    assert state.public_key() == PublicKey(keys["own_address"])
+    assert state.base_mint() == PublicKey(keys["base_mint"])
+    assert state.quote_vault() == PublicKey(keys["quote_vault"])
+    assert state.bids() is state.bids()
+    assert state.vault_signer_nonce() == 1
+    assert state.quote_dust_threshold() == 6
+    assert state.fee_rate_bps() == 22
+    assert state.base_lot_size() == 100
+    assert state.quote_spl_token_multiplier() == 10**9
+    with pytest.raises(AttributeError):
+        state.extra = 1  # pylint: disable=assigning-non-slot
+
+
+def test_market_state_rejects_partial_container():
+    with pytest.raises(KeyError):
+        State(Container(base_lot_size=100, quote_lot_size=10), DEFAULT_DEX_PROGRAM_ID, 6, 6)
+
+
+def test_load_many():
+    usdc = bytes([200] * 32)
+    base_mints = [bytes([100 + i] * 32) for i in range(3)] + [bytes(WRAPPED_SOL_MINT)]
+    markets = {
+        bytes([i + 1] * 32): build_market_data(base_mint=mint, quote_mint=usdc) for i, mint in enumerate(base_mints)
+    }
+    mints = {mint: MINT_LAYOUT.build(dict(decimals=i)) for i, mint in enumerate(base_mints[:3])}
+    mints[usdc] = MINT_LAYOUT.build(dict(decimals=6))
+    conn = StubbedAccountsClient({**markets, **mints})
+    addresses = [PublicKey(address) for address in markets]
+    loaded = Market.load_many(conn, addresses)
+    assert [market.state.public_key() for market in loaded] == [PublicKey(bytes(32))] * 4
+    assert [market.state.base_spl_token_decimals() for market in loaded] == [0, 1, 2, 9]
+    assert [market.state.quote_spl_token_decimals() for market in loaded] == [6] * 4
+    # One request for the markets, then one for the four distinct mints that are not wrapped SOL.
+    assert len(conn.requests) == 2
+    assert conn.requests[0] == addresses
+    assert sorted(bytes(mint) for mint in conn.requests[1]) == sorted(mints)
+    with pytest.raises(Exception):
+        Market.load_many(conn, [PublicKey(bytes([9] * 32))])
+
+
+def test_place_order_caches_open_orders_address():
+    owner = Keypair()
+    market_address = bytes([1] * 32)
+    open_orders_address = PublicKey(bytes([10] * 32))
+    conn = StubbedAccountsClient(
+        {bytes(open_orders_address): build_open_orders_data(market=market_address, owner=bytes(owner.public_key))}
+    )
+    market = Market(conn, State.from_bytes(DEFAULT_DEX_PROGRAM_ID, 6, 6, build_market_data(own_address=market_address)))
+
+    def place_order():
+        conn.requests.clear()
+        market.place_order(PublicKey(bytes([7] * 32)), owner, OrderType.LIMIT, Side.BUY, 1.0, 1.0)
+        transaction = conn.requests[-1]
+        return conn.requests[:-1], transaction.instructions[-1].keys[1].pubkey
+
+    # The first order looks the account up, the next ones only send their transaction.
+    requests, used_address = place_order()
+    assert len(requests) == 1 and used_address == open_orders_address
+    requests, used_address = place_order()
+    assert not requests and used_address == open_orders_address
+
+    market.invalidate_open_orders_cache(owner.public_key)
+    assert len(place_order()[0]) == 1
+    market.open_orders_cache_ttl = -1
+    assert len(place_order()[0]) == 1
+    market.open_orders_cache_ttl = 60
+
+    # A failed send drops the cached address.
+    conn.send_error = Exception("Transaction simulation failed")
+    with pytest.raises(Exception):
+        place_order()
+    conn.send_error = None
+    assert len(place_order()[0]) == 1
+
+
+def test_place_order_on_sol_market_uses_open_orders_balance():
+    owner = Keypair()
+    market_address = bytes([1] * 32)
+    open_orders_address = PublicKey(bytes([10] * 32))
+    quote_token_free = 2 * LAMPORTS_PER_SOL
+    conn = StubbedAccountsClient(
+        {
+            bytes(open_orders_address): build_open_orders_data(
+                market=market_address,
+                owner=bytes(owner.public_key),
+                balances=(0, 0, quote_token_free, quote_token_free),
+            )
+        }
+    )
+    market_data = build_market_data(own_address=market_address, quote_mint=bytes(WRAPPED_SOL_MINT))
+    market = Market(conn, State.from_bytes(DEFAULT_DEX_PROGRAM_ID, 6, 9, market_data))
+    for _ in range(2):
+        conn.requests.clear()
+        market.place_order(PublicKey(bytes([7] * 32)), owner, OrderType.LIMIT, Side.BUY, 1.0, 3.0)
+        # Buying with SOL always looks the account up, so that its free quote balance is deducted from the wrapping.
+        assert len(conn.requests) == 2
+        wrapping = decode_create_account(conn.requests[-1].instructions[0])
+        assert wrapping.lamports == round(3.0 * 1.01 * LAMPORTS_PER_SOL) - quote_token_free + 10000000
+
+
+def test_place_order_caches_new_open_orders_account():
+    owner = Keypair()
+    conn = StubbedAccountsClient({})
+    market = Market(conn, State.from_bytes(DEFAULT_DEX_PROGRAM_ID, 6, 6, build_market_data()))
+    market.place_order(PublicKey(bytes([7] * 32)), owner, OrderType.LIMIT, Side.BUY, 1.0, 1.0)
+    # The account lookup and the rent exemption request, then the transaction creating the account.
+    assert len(conn.requests) == 3
+    new_address = conn.requests[-1].instructions[0].keys[1].pubkey
+    conn.requests.clear()
+    market.place_order(PublicKey(bytes([7] * 32)), owner, OrderType.LIMIT, Side.BUY, 1.0, 1.0)
+    assert len(conn.requests) == 1
+    assert conn.requests[0].instructions[-1].keys[1].pubkey == new_address
@@ -0,0 +1,76 @@
+import json
+
+from solana.publickey import PublicKey
+
+from pyserum._layouts.market import MINT_LAYOUT
+from pyserum.instructions import DEFAULT_DEX_PROGRAM_ID
+from pyserum.market import Market, MarketCache
+
+from .stubbed_client import StubbedAccountsClient, build_market_data
+
+MARKET = PublicKey(bytes([1] * 32))
+BASE_MINT = bytes([2] * 32)
+QUOTE_MINT = bytes([3] * 32)
+
+
+def stubbed_client(quote_dust_threshold: int = 6) -> StubbedAccountsClient:
+    return StubbedAccountsClient(
+        {
+            bytes(MARKET): build_market_data(
+                base_mint=BASE_MINT, quote_mint=QUOTE_MINT, quote_dust_threshold=quote_dust_threshold
+            ),
+            BASE_MINT: MINT_LAYOUT.build(dict(decimals=8)),
+            QUOTE_MINT: MINT_LAYOUT.build(dict(decimals=6)),
+        }
+    )
+
+
+def test_market_cache_cold_start(tmp_path):
+    path = str(tmp_path / "markets.json")
+    conn = stubbed_client()
+    market = Market.load(conn, MARKET, cache=MarketCache(path))
+    assert market.state.base_spl_token_decimals() == 8
+    assert market.state.quote_spl_token_decimals() == 6
+    assert len(conn.requests) == 3
+    with open(path, "r") as cache_file:
+        content = json.load(cache_file)
+    assert list(content["markets"]) == [f"{DEFAULT_DEX_PROGRAM_ID}:{MARKET}"]
+    assert content["mints"] == {str(PublicKey(BASE_MINT)): 8, str(PublicKey(QUOTE_MINT)): 6}
+
+    # A new process loads the market from the file alone.
+    conn = StubbedAccountsClient({})
+    market = Market.load(conn, MARKET, cache=MarketCache(path))
+    assert market.state.quote_dust_threshold() == 6
+    assert market.state.base_spl_token_decimals() == 8
+    assert not conn.requests
+
+
+def test_market_cache_revalidates_in_background(tmp_path):
+    path = str(tmp_path / "markets.json")
+    Market.load(stubbed_client(), MARKET, cache=MarketCache(path))
+    cache = MarketCache(path, max_age=0)
+    conn = stubbed_client(quote_dust_threshold=7)
+    assert Market.load(conn, MARKET, cache=cache).state.quote_dust_threshold() == 6
+    cache.wait()
+    # Only the market is reloaded, the mint decimals never change.
+    assert conn.requests == [MARKET]
+    assert Market.load(conn, MARKET, cache=MarketCache(path, revalidate=False)).state.quote_dust_threshold() == 7
+
+
+def test_market_cache_reloads_stale_markets(tmp_path):
+    path = str(tmp_path / "markets.json")
+    Market.load(stubbed_client(), MARKET, cache=MarketCache(path))
+    conn = stubbed_client(quote_dust_threshold=7)
+    assert Market.load(conn, MARKET, cache=MarketCache(path, max_stale=0)).state.quote_dust_threshold() == 7
+    assert conn.requests == [MARKET]
+
+
+def test_market_cache_ignores_unreadable_file(tmp_path):
+    path = tmp_path / "markets.json"
+    path.write_text("{not json")
+    conn = stubbed_client()
+    cache = MarketCache(str(path))
+    assert Market.load(conn, MARKET, cache=cache).state.quote_dust_threshold() == 6
+    assert len(conn.requests) == 3
+    cache.invalidate(MARKET, DEFAULT_DEX_PROGRAM_ID)
+    assert json.loads(path.read_text())["markets"] == {}
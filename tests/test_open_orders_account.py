@@ -1,11 +1,17 @@
+import asyncio
 import base64
 
 import pytest
 from solana.publickey import PublicKey
+from solana.rpc.types import DataSliceOpts
 
-from pyserum.open_orders_account import OPEN_ORDERS_LAYOUT, OpenOrdersAccount
+from pyserum.async_open_orders_account import AsyncOpenOrdersAccount
+from pyserum.enums import Side
+from pyserum.instructions import DEFAULT_DEX_PROGRAM_ID
+from pyserum.open_orders_account import OPEN_ORDERS_LAYOUT, ActiveOrder, OpenOrdersAccount, OpenOrdersBalances
 
 from .binary_file_path import OPEN_ORDER_ACCOUNT_BIN_PATH
+from .stubbed_client import AsyncStubbedAccountsClient, StubbedAccountsClient, build_open_orders_data
 
 
 # TODO: This tests is not ran due to the v1 layout to v2 layout upgrade, we
@@ -41,3 +47,127 @@ def test_decode_open_order_account():
         assert len([order for order in open_order_account.orders if order != 0]) == 3
         # the first three order are bid order
         assert open_order_account.is_bid_bits == 0b111
+
+
+def test_active_orders():
+    orders = [0] * 128
+    client_ids = [0] * 128
+    orders[0], orders[3], orders[127] = 11, 33, 127
+    client_ids[0], client_ids[3], client_ids[127] = 1, 3, 7
+    open_order_account = OpenOrdersAccount(
+        address=PublicKey(1),
+        market=PublicKey(2),
+        owner=PublicKey(3),
+        base_token_free=0,
+        base_token_total=0,
+        quote_token_free=0,
+        quote_token_total=0,
+        free_slot_bits=(2**128 - 1) ^ (1 | 1 << 3 | 1 << 127),
+        is_bid_bits=1 << 3,
+        orders=orders,
+        client_ids=client_ids,
+    )
+    assert open_order_account.active_orders() == [
+        ActiveOrder(slot=0, side=Side.SELL, order_id=11, client_id=1),
+        ActiveOrder(slot=3, side=Side.BUY, order_id=33, client_id=3),
+        ActiveOrder(slot=127, side=Side.SELL, order_id=127, client_id=7),
+    ]
+
+
+def test_lazy_open_orders_account():
+    active = {0: (2**100 + 11, 1), 3: (2**64 + 33, 3), 127: (127, 2**64 - 1)}
+    data = build_open_orders_data(active=active, is_bid_bits=1 << 3)
+    eager = OpenOrdersAccount.from_bytes(PublicKey(1), data)
+    lazy = OpenOrdersAccount.from_bytes(PublicKey(1), data, lazy=True)
+    assert lazy.market == eager.market == PublicKey(bytes([2] * 32))
+    assert lazy.owner == eager.owner == PublicKey(bytes([3] * 32))
+    assert (lazy.base_token_free, lazy.base_token_total, lazy.quote_token_free, lazy.quote_token_total) == (1, 2, 3, 4)
+    assert lazy.free_slot_bits == eager.free_slot_bits
+    assert lazy.is_bid_bits == eager.is_bid_bits
+    assert lazy.active_orders() == eager.active_orders()
+    # Only the three occupied slots are decoded.
+    assert lazy.orders.decoded_count == lazy.client_ids.decoded_count == 3
+    assert list(lazy.orders) == eager.orders
+    assert list(lazy.client_ids) == list(eager.client_ids)
+    assert lazy.orders[-1] == 127
+    assert lazy.client_ids[:4] == [1, 0, 0, 3]
+
+
+def test_lazy_open_orders_account_rejects_other_accounts():
+    data = bytearray(build_open_orders_data())
+    data[5] = 0b1
+    with pytest.raises(Exception):
+        OpenOrdersAccount.from_bytes(PublicKey(1), bytes(data), lazy=True)
+    with pytest.raises(Exception):
+        OpenOrdersAccount.from_bytes(PublicKey(1), build_open_orders_data()[:200], lazy=True)
+
+
+def stubbed_open_orders_client() -> StubbedAccountsClient:
+    market, other_market, owner = bytes([2] * 32), bytes([4] * 32), bytes([3] * 32)
+    return StubbedAccountsClient(
+        {
+            bytes([10] * 32): build_open_orders_data(market=market, owner=owner, balances=(1, 2, 3, 4)),
+            bytes([11] * 32): build_open_orders_data(market=market, owner=owner, balances=(5, 6, 7, 8)),
+            bytes([12] * 32): build_open_orders_data(market=other_market, owner=owner),
+            bytes([13] * 32): build_open_orders_data(market=market, owner=bytes([5] * 32)),
+        }
+    )
+
+
+def test_find_balances_for_market_and_owner():
+    conn = stubbed_open_orders_client()
+    market, owner = PublicKey(bytes([2] * 32)), PublicKey(bytes([3] * 32))
+    balances = OpenOrdersAccount.find_balances_for_market_and_owner(conn, market, owner, DEFAULT_DEX_PROGRAM_ID)
+    assert balances == [
+        OpenOrdersBalances(PublicKey(bytes([10] * 32)), 1, 2, 3, 4),
+        OpenOrdersBalances(PublicKey(bytes([11] * 32)), 5, 6, 7, 8),
+    ]
+    assert conn.requests[-1][3] == DataSliceOpts(offset=77, length=32)
+    addresses = OpenOrdersAccount.find_addresses_for_market_and_owner(conn, market, owner, DEFAULT_DEX_PROGRAM_ID)
+    assert addresses == [PublicKey(bytes([10] * 32)), PublicKey(bytes([11] * 32))]
+    assert conn.requests[-1][3] == DataSliceOpts(offset=0, length=0)
+
+
+def test_find_all_for_owner():
+    conn = stubbed_open_orders_client()
+    accounts = OpenOrdersAccount.find_all_for_owner(conn, PublicKey(bytes([3] * 32)), DEFAULT_DEX_PROGRAM_ID)
+    assert sorted(accounts) == sorted([str(PublicKey(bytes([2] * 32))), str(PublicKey(bytes([4] * 32)))])
+    assert [account.address for account in accounts[str(PublicKey(bytes([2] * 32)))]] == [
+        PublicKey(bytes([10] * 32)),
+        PublicKey(bytes([11] * 32)),
+    ]
+    assert [account.address for account in accounts[str(PublicKey(bytes([4] * 32)))]] == [PublicKey(bytes([12] * 32))]
+    # Only the owner is filtered on.
+    assert len(conn.requests[-1][5]) == 1
+
+
+def stubbed_accounts_for_load_many():
+    accounts = {bytes([i] * 32): build_open_orders_data(balances=(i, 0, 0, 0)) for i in range(0, 250, 2)}
+    # A closed account left with zeroed data and an account of another kind are not open orders accounts.
+    accounts[bytes([4] * 32)] = bytes(len(accounts[bytes([4] * 32)]))
+    accounts[bytes([6] * 32)] = bytes(82)
+    addresses = [PublicKey(bytes([i] * 32)) for i in range(250)]
+    expected = [i if i % 2 == 0 and i not in (4, 6) else None for i in range(250)]
+    return accounts, addresses, expected
+
+
+def test_load_many():
+    accounts, addresses, expected = stubbed_accounts_for_load_many()
+    conn = StubbedAccountsClient(accounts)
+    loaded = OpenOrdersAccount.load_many(conn, addresses)
+    assert [None if account is None else account.base_token_free for account in loaded] == expected
+    assert [account.address for account in loaded if account is not None] == [
+        address for address, balance in zip(addresses, expected) if balance is not None
+    ]
+    assert [len(request) for request in conn.requests] == [100, 100, 50]
+    lazy = OpenOrdersAccount.load_many(conn, addresses[:3], lazy=True)
+    assert lazy[0].base_token_free == 0 and lazy[1] is None and lazy[2].base_token_free == 2
+
+
+def test_async_load_many():
+    accounts, addresses, expected = stubbed_accounts_for_load_many()
+    for concurrent in (False, True):
+        conn = AsyncStubbedAccountsClient(accounts)
+        loaded = asyncio.run(AsyncOpenOrdersAccount.load_many(conn, addresses, concurrent=concurrent))
+        assert [None if account is None else account.base_token_free for account in loaded] == expected
+        assert sorted(len(request) for request in conn.requests) == [50, 100, 100]
@@ -1,6 +1,15 @@
 import base64
 
-from pyserum.market._internal.queue import decode_event_queue
+import pytest
+from solana.publickey import PublicKey
+
+from pyserum._layouts.queue import EVENT_LAYOUT, QUEUE_HEADER_LAYOUT, REQUEST_LAYOUT
+from pyserum.market._internal.queue import (
+    EventQueueCursor,
+    decode_event_queue,
+    decode_event_queue_array,
+    decode_request_queue,
+)
 
 from .binary_file_path import EVENT_QUEUE_BIN_PATH
 
@@ -22,3 +31,161 @@ def test_decode_event_queue():
         assert event.open_order_slot == 17
         assert event.fee_tier == 0
         assert event.native_fee_or_rebate == 0
+
+
+def test_decode_event_queue_matches_layout():
+    """The struct based decoder should agree with the construct layout on every event."""
+    with open(EVENT_QUEUE_BIN_PATH, "r") as input_file:
+        base64_res = input_file.read()
+        data = base64.decodebytes(base64_res.encode("ascii"))
+        header = QUEUE_HEADER_LAYOUT.parse(data)
+        alloc_len = (len(data) - QUEUE_HEADER_LAYOUT.sizeof()) // EVENT_LAYOUT.sizeof()
+        events = decode_event_queue(data, alloc_len)
+        assert len(events) == alloc_len
+        # Checking every tenth event keeps the test quick while still covering the whole ring.
+        for i in range(0, alloc_len, 10):
+            event = events[i]
+            index = (header.head + header.count + alloc_len - 1 - i) % alloc_len
+            offset = QUEUE_HEADER_LAYOUT.sizeof() + index * EVENT_LAYOUT.sizeof()
+            parsed = EVENT_LAYOUT.parse(data[offset : offset + EVENT_LAYOUT.sizeof()])  # noqa: E203
+            assert event.event_flags.fill == parsed.event_flags.fill
+            assert event.event_flags.out == parsed.event_flags.out
+            assert event.event_flags.bid == parsed.event_flags.bid
+            assert event.event_flags.maker == parsed.event_flags.maker
+            assert event.open_order_slot == parsed.open_order_slot
+            assert event.fee_tier == parsed.fee_tier
+            assert event.native_quantity_released == parsed.native_quantity_released
+            assert event.native_quantity_paid == parsed.native_quantity_paid
+            assert event.native_fee_or_rebate == parsed.native_fee_or_rebate
+            assert event.order_id == int.from_bytes(parsed.order_id, "little")
+            assert event.public_key == PublicKey(parsed.public_key)
+            assert event.client_order_id == parsed.client_order_id
+
+
+def test_decode_event_queue_filters():
+    with open(EVENT_QUEUE_BIN_PATH, "r") as input_file:
+        data = bytearray(base64.decodebytes(input_file.read().encode("ascii")))
+    # Mark every third event as a fill, the recorded queue only holds out events.
+    for i, offset in enumerate(range(37, len(data) - 87, 88)):
+        data[offset] |= i % 3 == 0
+    data = bytes(data)
+    events = decode_event_queue(data, 300)
+    owners = [events[0].public_key, events[7].public_key]
+    assert decode_event_queue(data, 300, fills_only=True) == [event for event in events if event.event_flags.fill]
+    assert decode_event_queue(data, 300, owners=owners) == [event for event in events if event.public_key in owners]
+    assert decode_event_queue(data, 300, fills_only=True, owners=[bytes(owner) for owner in owners]) == [
+        event for event in events if event.event_flags.fill and event.public_key in owners
+    ]
+    assert decode_event_queue(data, 300, owners=[]) == []
+
+
+def test_decode_event_queue_array():
+    pytest.importorskip("numpy")
+    with open(EVENT_QUEUE_BIN_PATH, "r") as input_file:
+        data = base64.decodebytes(input_file.read().encode("ascii"))
+    for history in (None, 7):
+        events = decode_event_queue(data, history)
+        arrays = decode_event_queue_array(data, history)
+        assert arrays["order_id_high"].tolist() == [event.order_id >> 64 for event in events]
+        assert arrays["native_quantity_paid"].tolist() == [event.native_quantity_paid for event in events]
+        assert [bytes(owner) for owner in arrays["public_key"]] == [bytes(event.public_key) for event in events]
+
+
+def test_event_queue_cursor():
+    with open(EVENT_QUEUE_BIN_PATH, "r") as input_file:
+        base64_res = input_file.read()
+        data = base64.decodebytes(base64_res.encode("ascii"))
+        next_seq_num = QUEUE_HEADER_LAYOUT.parse(data).next_seq_num
+
+        cursor = EventQueueCursor()
+        update = cursor.update(data)
+        assert (update.events, update.seq_num, update.lost) == ([], next_seq_num, 0)
+        assert not cursor.update(data).events
+
+        cursor = EventQueueCursor(next_seq_num - 5)
+        update = cursor.update(data)
+        assert update.events == list(reversed(decode_event_queue(data, 5)))
+        assert update.seq_num == next_seq_num - 5
+        assert update.lost == 0
+        assert cursor.seq_num == next_seq_num
+
+
+def test_event_queue_cursor_lost_events():
+    with open(EVENT_QUEUE_BIN_PATH, "r") as input_file:
+        base64_res = input_file.read()
+        data = base64.decodebytes(base64_res.encode("ascii"))
+        next_seq_num = QUEUE_HEADER_LAYOUT.parse(data).next_seq_num
+        alloc_len = (len(data) - QUEUE_HEADER_LAYOUT.sizeof()) // EVENT_LAYOUT.sizeof()
+        update = EventQueueCursor(next_seq_num - alloc_len - 10).update(data)
+        assert update.lost == 10
+        assert update.seq_num == next_seq_num - alloc_len
+        assert update.events == list(reversed(decode_event_queue(data, alloc_len)))
+
+
+def test_event_queue_cursor_ahead_of_queue():
+    with open(EVENT_QUEUE_BIN_PATH, "r") as input_file:
+        base64_res = input_file.read()
+        data = base64.decodebytes(base64_res.encode("ascii"))
+        next_seq_num = QUEUE_HEADER_LAYOUT.parse(data).next_seq_num
+        # A lagging node serves an older queue, the events up to the cursor were already returned.
+        cursor = EventQueueCursor(next_seq_num + 5)
+        update = cursor.update(data)
+        assert (update.events, update.seq_num, update.lost) == ([], next_seq_num + 5, 0)
+        assert cursor.seq_num == next_seq_num + 5
+
+
+def test_decode_request_queue():
+    header = QUEUE_HEADER_LAYOUT.build(
+        dict(
+            account_flags=dict(
+                initialized=True,
+                market=False,
+                open_orders=False,
+                request_queue=True,
+                event_queue=False,
+                bids=False,
+                asks=False,
+            ),
+            head=2,
+            count=2,
+            next_seq_num=4,
+        )
+    )
+    requests = [
+        REQUEST_LAYOUT.build(
+            dict(
+                request_flags=dict(new_order=i % 2 == 0, cancel_order=i % 2 == 1, bid=i < 2, post_only=False, ioc=True),
+                open_order_slot=i,
+                fee_tier=1,
+                max_base_size_or_cancel_id=100 + i,
+                native_quote_quantity_locked=200 + i,
+                order_id=(2**100 + i).to_bytes(16, "little"),
+                open_orders=bytes([i + 1] * 32),
+                client_order_id=300 + i,
+            )
+        )
+        for i in range(3)
+    ]
+    # Requests 2 and 0 are the live ones as the queue wraps around after the third slot.
+    decoded = decode_request_queue(header + b"".join(requests))
+    assert [request.open_order_slot for request in decoded] == [2, 0]
+    request = decoded[0]
+    assert request.request_flags.new_order
+    assert not request.request_flags.cancel_order
+    assert not request.request_flags.bid
+    assert not request.request_flags.post_only
+    assert request.request_flags.ioc
+    assert request.fee_tier == 1
+    assert request.max_base_size_or_cancel_id == 102
+    assert request.native_quote_quantity_locked == 202
+    assert request.order_id == 2**100 + 2
+    assert request.open_orders == PublicKey(bytes([3] * 32))
+    assert request.client_order_id == 302
+    assert decoded[1].request_flags.bid
+    assert [request.open_order_slot for request in decode_request_queue(header + b"".join(requests), 3)] == [0, 2, 1]
+    filtered = decode_request_queue(header + b"".join(requests), 3, new_orders_only=True)
+    assert [request.open_order_slot for request in filtered] == [0, 2]
+    filtered = decode_request_queue(
+        header + b"".join(requests), 3, owners=[PublicKey(bytes([2] * 32)), bytes([3] * 32)]
+    )
+    assert [request.open_order_slot for request in filtered] == [2, 1]
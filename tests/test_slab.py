@@ -2,8 +2,10 @@
 
 import base64
 
+from solana.publickey import PublicKey
+
 from pyserum._layouts.slab import ORDER_BOOK_LAYOUT, SLAB_HEADER_LAYOUT, SLAB_LAYOUT, SLAB_NODE_LAYOUT
-from pyserum.market._internal.slab import Slab
+from pyserum.market._internal.slab import OrderAdded, OrderRemoved, OrderSizeChanged, Slab, diff
 
 from .binary_file_path import ASK_ORDER_BIN_PATH
 
@@ -74,6 +76,22 @@ def test_slab_get():
     assert slab.get(99999999999999999999999999999) is None
 
 
+def test_slab_get_many():
+    slab = Slab.from_bytes(DATA)
+    keys = [123456789012345678901234567890, 100000000000000000000000000000, 200000000000000000000000000000, 4]
+    missing = [0, 3, 5, 200000000000000000000000000001, 99999999999999999999999999999]
+    found = slab.get_many(keys + missing)
+    assert found == {key: slab.get(key) for key in keys}
+    assert not slab.get_many([])
+
+
+def test_slab_leaf_keeps_raw_owner():
+    leaf = Slab.from_bytes(DATA).get(4)
+    assert not hasattr(leaf, "__dict__")
+    assert leaf.owner_bytes == bytes([0x17] * 32)
+    assert leaf.owner == PublicKey(bytes([0x17] * 32))
+
+
 def test_length_of_slab_iterator():
     slab = Slab.from_bytes(DATA)
     assert sum(1 for _ in slab.items()) == 4
@@ -97,3 +115,97 @@ def test_iterate_in_descending_order():
         if prev:
             assert curr_key < prev
         prev = curr_key
+
+
+def test_slab_from_bytes_matches_layout():
+    """The struct based decoder should agree with the construct layout on every leaf."""
+    with open(ASK_ORDER_BIN_PATH, "r") as input_file:
+        base64_res = input_file.read()
+        data = base64.decodebytes(base64_res.encode("ascii"))
+        parsed = ORDER_BOOK_LAYOUT.parse(data).slab_layout
+        slab = Slab.from_bytes(data[13:])
+        leaves = [node.node for node in parsed.nodes if node.tag == 2]
+        assert len(leaves) == parsed.header.leaf_count == sum(1 for _ in slab.items())
+        for leaf in leaves:
+            node = slab.get(int.from_bytes(leaf.key, "little"))
+            assert node is not None
+            assert node.owner_slot == leaf.owner_slot
+            assert node.fee_tier == leaf.fee_tier
+            assert bytes(node.owner) == leaf.owner
+            assert node.quantity == leaf.quantity
+            assert node.client_order_id == leaf.client_order_id
+
+
+def test_lazy_slab_matches_eager_slab():
+    eager = Slab.from_bytes(DATA)
+    lazy = Slab.from_bytes(DATA, lazy=True)
+    assert list(lazy.items()) == list(eager.items())
+    assert list(lazy.items(descending=True)) == list(eager.items(descending=True))
+    assert lazy.get(4) == eager.get(4)
+    assert lazy.get(5) is None
+
+
+def test_lazy_slab_only_decodes_visited_nodes():
+    with open(ASK_ORDER_BIN_PATH, "r") as input_file:
+        base64_res = input_file.read()
+        data = base64.decodebytes(base64_res.encode("ascii"))
+        slab = Slab.from_bytes(data[13:], lazy=True)
+        first = next(iter(slab.items()))
+        decoded = slab._nodes.decoded_count  # pylint: disable=protected-access
+        assert first == Slab.from_bytes(data[13:]).get(first.key)
+        assert 0 < decoded < 239
+
+
+def test_slab_range():
+    slab = Slab.from_bytes(DATA)
+    assert list(slab.range(0, 2**128 - 1)) == list(slab.items())
+    assert list(slab.range(0, 2**128 - 1, descending=True)) == list(slab.items(descending=True))
+    assert [node.key for node in slab.range(5, 150000000000000000000000000000)] == [
+        100000000000000000000000000000,
+        123456789012345678901234567890,
+    ]
+    assert [node.key for node in slab.range(4, 4)] == [4]
+    assert not list(slab.range(5, 99999999999999999999999999999))
+
+
+def test_slab_min_and_max_leaf():
+    slab = Slab.from_bytes(DATA)
+    assert slab.min_leaf() == next(iter(slab.items()))
+    assert slab.max_leaf() == next(iter(slab.items(descending=True)))
+    assert slab.min_leaf().key == 4
+    assert slab.max_leaf().key == 200000000000000000000000000000
+
+
+def _node_offset(index: int) -> int:
+    return 32 + index * 72
+
+
+def test_diff_identical_snapshots():
+    assert not list(diff(DATA, DATA))
+
+
+def test_diff_size_changed():
+    data = bytearray(DATA)
+    # Leaf quantity is at offset 56 of the node.
+    data[_node_offset(1) + 56 : _node_offset(1) + 64] = (300).to_bytes(8, "little")  # noqa: E203
+    deltas = list(diff(DATA, bytes(data)))
+    assert len(deltas) == 1
+    assert isinstance(deltas[0], OrderSizeChanged)
+    assert deltas[0].order_id == 100000000000000000000000000000
+    assert deltas[0].previous_quantity == 321
+    assert deltas[0].node.quantity == 300
+
+
+def test_diff_removed_and_added():
+    data = bytearray(DATA)
+    removed = Slab.from_bytes(DATA).get(4)
+    # Turn the leaf at index 5 into a free node, and reuse the free node at index 8 for a new leaf.
+    data[_node_offset(5) : _node_offset(5) + 4] = (3).to_bytes(4, "little")  # noqa: E203
+    data[_node_offset(8) : _node_offset(9)] = DATA[_node_offset(5) : _node_offset(6)]  # noqa: E203
+    data[_node_offset(8) + 8 : _node_offset(8) + 24] = (7).to_bytes(16, "little")  # noqa: E203
+    deltas = list(diff(DATA, bytes(data)))
+    assert deltas == [
+        OrderRemoved(order_id=4, node=removed),
+        OrderAdded(order_id=7, node=deltas[1].node),
+    ]
+    assert deltas[1].node.quantity == removed.quantity
@@ -0,0 +1,88 @@
+from solana.publickey import PublicKey
+
+from pyserum.enums import Side
+from pyserum.market import TradeTape
+from pyserum.market.types import Candle, Event, EventFlags, EventQueueUpdate
+
+TAKER = PublicKey(bytes([1] * 32))
+MAKERS = [PublicKey(bytes([i + 2] * 32)) for i in range(3)]
+
+
+def fill(  # pylint: disable=too-many-arguments
+    owner: PublicKey, maker: bool, bid: bool, paid: int, released: int, fee: int, order_id: int
+) -> Event:
+    return Event(
+        event_flags=EventFlags(fill=True, out=False, bid=bid, maker=maker),
+        open_order_slot=0,
+        fee_tier=0,
+        native_quantity_released=released,
+        native_quantity_paid=paid,
+        native_fee_or_rebate=fee,
+        order_id=order_id,
+        public_key=owner,
+        client_order_id=0,
+    )
+
+
+def out(owner: PublicKey) -> Event:
+    return Event(
+        event_flags=EventFlags(fill=False, out=True, bid=False, maker=True),
+        open_order_slot=0,
+        fee_tier=0,
+        native_quantity_released=0,
+        native_quantity_paid=0,
+        native_fee_or_rebate=0,
+        order_id=0,
+        public_key=owner,
+        client_order_id=0,
+    )
+
+
+# A taker buy matching two asks of 1 and 2 base units at prices 2 and 3, with a taker fee of 31.
+BUY_EVENTS = [
+    fill(MAKERS[0], True, False, 1_000_000, 2_000_001, 1, 10),
+    out(MAKERS[0]),
+    fill(MAKERS[1], True, False, 2_000_000, 6_000_002, 2, 11),
+    fill(TAKER, False, True, 3_000_000, 8_000_000, 31, 20),
+]
+
+
+def test_trade_tape_pairs_fills(stubbed_market):
+    tape = TradeTape(stubbed_market)
+    trades = tape.update(EventQueueUpdate(events=BUY_EVENTS, seq_num=100, lost=0), timestamp=0)
+    assert [trade.seq_num for trade in trades] == [100, 102]
+    assert [trade.side for trade in trades] == [Side.BUY, Side.BUY]
+    assert [trade.maker for trade in trades] == MAKERS[:2]
+    assert [trade.taker for trade in trades] == [TAKER, TAKER]
+    assert [trade.price for trade in trades] == [2, 3]
+    assert [trade.size for trade in trades] == [1, 2]
+    assert [trade.maker_order_id for trade in trades] == [10, 11]
+    assert [trade.taker_order_id for trade in trades] == [20, 20]
+    assert [trade.maker_fee_cost for trade in trades] == [1, 2]
+    assert sum(trade.taker_fee_cost for trade in trades) == -31
+    assert [trade.taker_fee_cost for trade in trades] == [-11, -20]
+    assert list(tape.trades) == trades
+
+
+def test_trade_tape_skips_seen_events(stubbed_market):
+    tape = TradeTape(stubbed_market)
+    assert len(tape.update(EventQueueUpdate(events=BUY_EVENTS[:2], seq_num=100, lost=0), timestamp=0)) == 0
+    # The second update overlaps with the first, the maker fill at 100 is only paired once.
+    assert len(tape.update(EventQueueUpdate(events=BUY_EVENTS, seq_num=100, lost=0), timestamp=0)) == 2
+    assert len(tape.update(EventQueueUpdate(events=BUY_EVENTS, seq_num=100, lost=0), timestamp=0)) == 0
+    # Makers from before a gap are not paired with a later taker.
+    assert len(tape.update(EventQueueUpdate(events=BUY_EVENTS[:1], seq_num=104, lost=0), timestamp=0)) == 0
+    assert len(tape.update(EventQueueUpdate(events=BUY_EVENTS[3:], seq_num=110, lost=0), timestamp=0)) == 0
+    assert len(tape.trades) == 2
+
+
+def test_trade_tape_candles(stubbed_market):
+    tape = TradeTape(stubbed_market, intervals=(60, 3600), max_candles=2)
+    for minute in range(4):
+        tape.update(EventQueueUpdate(events=BUY_EVENTS, seq_num=100 + 4 * minute, lost=0), timestamp=60 * minute + 1)
+    assert tape.candles(60) == [
+        Candle(start=60, open=2, high=3, low=2, close=3, volume=3, quote_volume=8, trades=2),
+        Candle(start=120, open=2, high=3, low=2, close=3, volume=3, quote_volume=8, trades=2),
+        Candle(start=180, open=2, high=3, low=2, close=3, volume=3, quote_volume=8, trades=2),
+    ]
+    assert tape.candles(3600) == [Candle(start=0, open=2, high=3, low=2, close=3, volume=12, quote_volume=32, trades=8)]
@@ -0,0 +1,37 @@
+from solana.publickey import PublicKey
+
+from pyserum.utils import PublicKeyCache, PublicKeyCacheInfo, load_multiple_bytes_data
+
+from .stubbed_client import StubbedAccountsClient
+
+
+def test_public_key_cache_interns_keys():
+    cache = PublicKeyCache(maxsize=2)
+    first = cache.get(bytes([1] * 32))
+    assert first == PublicKey(bytes([1] * 32))
+    assert cache.get(bytes([1] * 32)) is first
+    assert cache.cache_info() == PublicKeyCacheInfo(hits=1, misses=1, maxsize=2, currsize=1)
+
+
+def test_public_key_cache_evicts_least_recently_used():
+    cache = PublicKeyCache(maxsize=2)
+    first = cache.get(bytes([1] * 32))
+    cache.get(bytes([2] * 32))
+    cache.get(bytes([1] * 32))
+    cache.get(bytes([3] * 32))
+    assert cache.cache_info().currsize == 2
+    assert cache.get(bytes([1] * 32)) is first
+    assert cache.cache_info().misses == 3
+    cache.get(bytes([2] * 32))
+    assert cache.cache_info().misses == 4
+    cache.clear()
+    assert cache.cache_info() == PublicKeyCacheInfo(hits=0, misses=0, maxsize=2, currsize=0)
+
+
+def test_load_multiple_bytes_data():
+    accounts = {bytes([i] * 32): bytes([i]) * 10 for i in range(0, 250, 2)}
+    conn = StubbedAccountsClient(accounts)
+    addresses = [PublicKey(bytes([i] * 32)) for i in range(250)]
+    data = load_multiple_bytes_data(addresses, conn)
+    assert data == [accounts.get(bytes([i] * 32)) for i in range(250)]
+    assert [len(request) for request in conn.requests] == [100, 100, 50]